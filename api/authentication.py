@@ -0,0 +1,42 @@
+import uuid
+
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from users.cache import user_status_cache
+
+
+class AccountTokenUser(TokenUser):
+    """A ``TokenUser`` whose ``pk`` is a UUID, like ``AccountUser.pk``."""
+
+    @cached_property
+    def id(self):
+        return uuid.UUID(str(self.token[api_settings.USER_ID_CLAIM]))
+
+
+class CachedStatusJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Trusts the claims of a validated access token instead of loading the
+    user row for every request. The request user is an ``AccountTokenUser``
+    that only carries the user id, so views must scope queries by
+    ``request.user.pk``.
+
+    Deactivated and deleted users are still rejected through the cached
+    account status in ``users.cache``.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        try:
+            user_id = user.pk
+        except ValueError:
+            raise AuthenticationFailed(
+                _("Token contained no recognizable user identification"),
+                code="user_not_found",
+            )
+        if not user_status_cache.is_active(user_id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return user
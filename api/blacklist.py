@@ -0,0 +1,134 @@
+"""
+In-process filter in front of the refresh token blacklist.
+
+Every worker keeps a Bloom filter of blacklisted token ids (``jti``). A token
+that is not in the filter is certainly not blacklisted as of the last sync, so
+the blacklist table is only queried for possible hits. The filter picks up
+rows blacklisted elsewhere every ``TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL``
+seconds by reading new rows past the last seen id, and is rebuilt from the
+unexpired rows every ``TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL`` seconds.
+
+Tokens blacklisted by this process are added right away; tokens blacklisted
+by other processes may be accepted here until the next sync. Set the sync
+interval to 0 to sync before every check.
+"""
+
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+# Rows re-read below the last seen id on every sync, so rows committed out of
+# id order by concurrent transactions are not skipped
+SYNC_OVERLAP = 100
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = max(
+            8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self.bits = bytearray(math.ceil(self.size / 8))
+
+    def positions(self, item):
+        # Double hashing: k positions derived from two 64-bit hashes
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        new = False
+        for position in self.positions(item):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                new = True
+        # Items already present (re-read rows) are not counted twice
+        if new:
+            self.count += 1
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+class BlacklistFilter:
+    min_capacity = 1024
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bloom = None
+        self.last_id = 0
+        self.synced_at = 0.0
+        self.built_at = 0.0
+
+    def reset(self):
+        with self._lock:
+            self.bloom = None
+
+    def add(self, jti):
+        with self._lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+
+    def might_contain(self, jti):
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self.bloom is None
+                or now - self.built_at
+                >= settings.TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL
+                or self.bloom.count > self.bloom.capacity
+            ):
+                self.rebuild(now)
+            elif now - self.synced_at >= settings.TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL:
+                self.sync(now)
+            return jti in self.bloom
+
+    def rebuild(self, now):
+        # Expired tokens fail signature verification anyway, so they are
+        # left out, which keeps the filter proportional to live tokens
+        rows = BlacklistedToken.objects.filter(
+            token__expires_at__gt=timezone.now()
+        ).values_list("id", "token__jti")
+        rows = list(rows.iterator())
+        self.bloom = BloomFilter(max(self.min_capacity, 2 * len(rows)))
+        self.last_id = 0
+        self.add_rows(rows)
+        # Rows that expired between syncs are skipped by the id-based sync
+        self.last_id = max(
+            self.last_id,
+            BlacklistedToken.objects.order_by("-id")
+            .values_list("id", flat=True)
+            .first()
+            or 0,
+        )
+        self.built_at = self.synced_at = now
+
+    def sync(self, now):
+        rows = (
+            BlacklistedToken.objects.filter(id__gt=self.last_id - SYNC_OVERLAP)
+            .order_by("id")
+            .values_list("id", "token__jti")
+        )
+        self.add_rows(rows)
+        self.synced_at = now
+
+    def add_rows(self, rows):
+        for row_id, jti in rows:
+            self.bloom.add(jti)
+            self.last_id = max(self.last_id, row_id)
+
+
+blacklist_filter = BlacklistFilter()
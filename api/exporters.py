@@ -0,0 +1,77 @@
+import csv
+import json
+import zlib
+
+from core.fields import decompress_text
+from rest_framework.utils.encoders import JSONEncoder
+
+EXPORT_FIELDS = ["id", "title", "content", "created_at", "last_modified_at"]
+
+
+class Echo:
+    """A file-like object that hands back what is written to it."""
+
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(row, cls=JSONEncoder, ensure_ascii=False) + "\n"
+
+
+def csv_lines(rows, fieldnames=EXPORT_FIELDS):
+    writer = csv.DictWriter(Echo(), fieldnames=fieldnames)
+    yield writer.writeheader()
+    for row in rows:
+        yield writer.writerow(
+            {
+                key: value.isoformat() if hasattr(value, "isoformat") else value
+                for key, value in row.items()
+            }
+        )
+
+
+def encode_chunks(lines, chunk_size=64 * 1024):
+    """Group text lines into byte chunks of roughly ``chunk_size``."""
+    buffer, size = [], 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        size += len(data)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_notes(queryset, file_format, gzip=False, chunk_size=2000):
+    """
+    Stream every note of ``queryset`` as NDJSON or CSV bytes. Rows are read
+    with ``QuerySet.iterator()`` (server-side cursors on PostgreSQL), so memory
+    stays flat regardless of how many notes are exported.
+    """
+    content = EXPORT_FIELDS.index("content")
+    rows = (
+        dict(
+            zip(EXPORT_FIELDS, values),
+            # values_list() hands back the stored, possibly compressed, body
+            content=decompress_text(values[content]),
+        )
+        for values in queryset.order_by("created_at", "id")
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    lines = csv_lines(rows) if file_format == "csv" else ndjson_lines(rows)
+    chunks = encode_chunks(lines)
+    return gzip_chunks(chunks) if gzip else chunks
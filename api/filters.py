@@ -0,0 +1,18 @@
+from core.search import search_notes
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+
+class NoteSearchFilter(filters.BaseFilterBackend):
+    """
+    Full-text search over note titles and content using ``core.search``.
+    Results are ranked by relevance unless the client asks for an explicit
+    ``ordering``.
+    """
+
+    search_param = api_settings.SEARCH_PARAM
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, "")
+        ranked = api_settings.ORDERING_PARAM not in request.query_params
+        return search_notes(queryset, query, ranked=ranked)
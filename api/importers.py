@@ -0,0 +1,179 @@
+import codecs
+import csv
+import json
+
+from api.serializers import NoteSerializer
+from core.models import Note
+from core.search import index_notes
+from core.signals import notes_changed
+from django.db import DatabaseError, transaction
+
+IMPORT_FORMATS = ("ndjson", "csv")
+
+# Only the first errors are kept so a broken file cannot exhaust memory
+MAX_REPORTED_ERRORS = 100
+
+
+class InvalidRecord:
+    """Placeholder for a record that could not even be parsed."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def guess_format(filename, default="ndjson"):
+    extension = (filename or "").lower().rsplit(".", 1)[-1]
+    if extension in ("jsonl", "ndjson", "json"):
+        return "ndjson"
+    if extension == "csv":
+        return "csv"
+    return default
+
+
+class UnreadableFile(Exception):
+    """The rest of the file cannot be parsed into records."""
+
+
+def decode_lines(fileobj):
+    for number, line in enumerate(fileobj):
+        if number == 0:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        yield line.decode("utf-8")
+
+
+def iter_records(fileobj, file_format):
+    """
+    Lazily parse an uploaded binary file into dictionaries, one per note.
+    Nothing but the current line is held in memory.
+
+    NDJSON lines that cannot be decoded are reported as ``InvalidRecord``.
+    A CSV record may span lines, so a CSV file that cannot be decoded or
+    parsed raises ``UnreadableFile`` instead.
+    """
+    if file_format == "csv":
+        reader = csv.DictReader(decode_lines(fileobj))
+        try:
+            yield from reader
+        except (UnicodeDecodeError, csv.Error) as exc:
+            # The broken line may not have been counted yet
+            raise UnreadableFile(f"Invalid CSV after line {reader.line_num}: {exc}")
+        return
+
+    for number, line in enumerate(fileobj):
+        if number == 0:
+            line = line.removeprefix(codecs.BOM_UTF8)
+        try:
+            line = line.decode("utf-8").strip()
+        except UnicodeDecodeError as exc:
+            yield InvalidRecord(f"Invalid UTF-8: {exc}")
+            continue
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield InvalidRecord(f"Invalid JSON: {exc}")
+
+
+class ImportResult:
+    def __init__(self, start=0):
+        self.start = start
+        self.processed = start
+        self.created = 0
+        self.failed = 0
+        self.errors = []
+        self.completed = False
+        self.resume_from = start
+        self.error = None
+        # Whether the import stopped on the file rather than the database
+        self.unreadable = False
+
+    def add_error(self, record_number, errors):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"record": record_number, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "completed": self.completed,
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": self.errors,
+            "resume_from": self.resume_from,
+            "error": self.error,
+        }
+
+
+class NoteImporter:
+    """
+    Validates records with ``NoteSerializer`` and inserts the valid ones in
+    fixed-size ``bulk_create`` batches, each in its own transaction.
+
+    Invalid records are skipped and reported. If a batch cannot be written or
+    the rest of the file cannot be read, the import stops and ``resume_from``
+    tells how many records were safely handled; passing it back as ``start``
+    skips them on the next run.
+    """
+
+    def __init__(self, author_id, batch_size=500, progress=None):
+        self.author_id = author_id
+        self.batch_size = batch_size
+        self.progress = progress
+
+    def run(self, records, start=0):
+        result = ImportResult(start)
+        batch = []
+
+        try:
+            for number, record in enumerate(records, start=1):
+                if number <= start:
+                    continue
+
+                if isinstance(record, InvalidRecord):
+                    result.add_error(number, {"non_field_errors": [record.message]})
+                else:
+                    serializer = NoteSerializer(data=record)
+                    if serializer.is_valid():
+                        batch.append(
+                            Note(author_id=self.author_id, **serializer.validated_data)
+                        )
+                    else:
+                        result.add_error(number, serializer.errors)
+                result.processed = number
+
+                if len(batch) >= self.batch_size:
+                    if not self.flush(batch, result):
+                        return result
+                    batch = []
+        except UnreadableFile as exc:
+            # Keep the records before the broken one; a fixed file can resume
+            if self.flush(batch, result):
+                result.error = str(exc)
+                result.unreadable = True
+            return result
+
+        if not self.flush(batch, result):
+            return result
+        result.completed = True
+        return result
+
+    def flush(self, batch, result):
+        if batch:
+            try:
+                with transaction.atomic():
+                    Note.objects.bulk_create(batch)
+                    index_notes(batch)
+            except DatabaseError as exc:
+                # Everything before this batch is committed and can be skipped
+                result.processed = result.resume_from
+                result.error = str(exc)
+                return False
+
+            result.created += len(batch)
+            notes_changed.send(sender=Note, author_ids={self.author_id})
+
+        result.resume_from = result.processed
+        if self.progress:
+            self.progress(result)
+        return True
@@ -0,0 +1,74 @@
+from api.importers import IMPORT_FORMATS, NoteImporter, guess_format, iter_records
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.models import AccountUser
+
+
+class Command(BaseCommand):
+    help = "Import notes for a user from an NDJSON or CSV file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument(
+            "--user", required=True, help="Email address of the notes' author"
+        )
+        parser.add_argument(
+            "--format",
+            dest="file_format",
+            choices=IMPORT_FORMATS,
+            help="File format (default: guessed from the extension)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.NOTES_IMPORT_BATCH_SIZE,
+            help="Notes inserted per transaction",
+        )
+        parser.add_argument(
+            "--resume-from",
+            type=int,
+            default=0,
+            help="Skip this many records, as reported by an interrupted run",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = AccountUser.objects.get(email_address=options["user"])
+        except AccountUser.DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        file_format = options["file_format"] or guess_format(options["path"])
+        importer = NoteImporter(
+            user.pk, batch_size=options["batch_size"], progress=self.report
+        )
+        try:
+            with open(options["path"], "rb") as fileobj:
+                result = importer.run(
+                    iter_records(fileobj, file_format), start=options["resume_from"]
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"Record {error['record']}: {error['errors']}")
+        if result.failed > len(result.errors):
+            self.stderr.write(f"... and {result.failed - len(result.errors)} more")
+
+        if not result.completed:
+            raise CommandError(
+                f"Import stopped: {result.error}. "
+                f"Run again with --resume-from {result.resume_from} to continue."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {result.created} notes ({result.failed} invalid records)."
+            )
+        )
+
+    def report(self, result):
+        self.stdout.write(
+            f"Processed {result.processed} records: "
+            f"{result.created} created, {result.failed} invalid"
+        )
@@ -0,0 +1,139 @@
+import hashlib
+
+from core.cache import note_list_cache
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class CachedListMixin:
+    """
+    Serves serialized ``list`` pages from the per-user versioned note list
+    cache. The key covers every query parameter (search, ordering, cursor).
+    The page's ``list_last_modified`` (see ``ConditionalGetMixin``) is
+    cached with it.
+    """
+
+    list_cache_scope = "api"
+
+    def list(self, request, *args, **kwargs):
+        cache_key = note_list_cache.make_key(
+            self.list_cache_scope, request.user.pk, request.build_absolute_uri()
+        )
+        cached = note_list_cache.get(cache_key)
+        if cached is None:
+            data = super().list(request, *args, **kwargs).data
+            cached = (data, getattr(self, "list_last_modified", None))
+            note_list_cache.set(cache_key, cached)
+        data, self.list_last_modified = cached
+        return Response(data)
+
+
+class ConditionalGetMixin:
+    """
+    Adds strong ``ETag`` and ``Last-Modified`` validators to ``retrieve`` and
+    ``list`` and answers matching ``If-None-Match`` / ``If-Modified-Since``
+    requests with ``304 Not Modified``.
+
+    Validators come from the ``last_modified_at`` column kept by
+    ``ObjectEventTracker``. Lists are validated by ``max(last_modified_at)``
+    and the row count, checked before the page is queried or serialized.
+    When the note list cache is enabled a page's ETag instead covers the
+    cached page and the user's note list cache version, and its
+    ``Last-Modified`` is the newest of its rows (``list_last_modified``), so
+    validating a cached page needs no query. Removing a row need not move
+    the newest time, so for lists only ``If-None-Match`` is evaluated.
+    """
+
+    list_last_modified = None
+
+    def make_etag(self, *parts):
+        # Representations differ per renderer, so the format is part of the tag
+        parts += (self.request.accepted_renderer.format,)
+        return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+    def conditional_response(self, request, etag, last_modified, respond):
+        # HTTP dates have a resolution of one second
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response.headers["ETag"] = etag
+            if timestamp is not None:
+                response.headers["Last-Modified"] = http_date(timestamp)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            last_modified = (
+                self.filter_queryset(self.get_queryset())
+                .filter(**lookup)
+                .values_list("last_modified_at", flat=True)
+                .first()
+            )
+        except (TypeError, ValueError, ValidationError):
+            last_modified = None
+        if last_modified is None:
+            # Let the regular path produce the 404
+            return super().retrieve(request, *args, **kwargs)
+
+        etag = self.make_etag(str(lookup), last_modified.isoformat())
+        return self.conditional_response(
+            request,
+            etag,
+            last_modified,
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+        )
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            self.list_last_modified = max(
+                (note.last_modified_at for note in page), default=None
+            )
+        return page
+
+    def list(self, request, *args, **kwargs):
+        if note_list_cache.enabled:
+            return self.list_cached_page(request, *args, **kwargs)
+
+        # Without the cache, one aggregate answers unchanged lists before the
+        # page is queried or serialized
+        summary = self.filter_queryset(self.get_queryset()).aggregate(
+            latest=Max("last_modified_at"), count=Count("pk")
+        )
+        latest = summary["latest"]
+        etag = self.make_etag(
+            str(request.user.pk),
+            request.get_full_path(),
+            latest.isoformat() if latest else None,
+            summary["count"],
+        )
+        response = self.conditional_response(
+            request,
+            etag,
+            None,
+            lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs),
+        )
+        return self.set_list_last_modified(response, latest)
+
+    def list_cached_page(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if response.status_code != 200:
+            return response
+        version = note_list_cache.get_version(request.user.pk)
+        etag = self.make_etag(
+            str(request.user.pk), request.get_full_path(), version, response.data
+        )
+        response = self.conditional_response(request, etag, None, lambda: response)
+        return self.set_list_last_modified(response, self.list_last_modified)
+
+    def set_list_last_modified(self, response, latest):
+        if latest is not None and response.status_code in (200, 304):
+            response.headers["Last-Modified"] = http_date(int(latest.timestamp()))
+        return response
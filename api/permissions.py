@@ -8,4 +8,4 @@ class IsOwner(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # Only allow owners of the note to access it
-        return obj.author == request.user
+        return obj.author_id == request.user.pk
@@ -0,0 +1,28 @@
+from rest_framework.renderers import BaseRenderer
+
+from .exporters import csv_lines, ndjson_lines
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Newline delimited JSON: one object per line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Same lines as a streamed export (api.exporters)
+        rows = data if isinstance(data, list) else [data]
+        return "".join(ndjson_lines(rows)).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        if not rows:
+            return b""
+        return "".join(csv_lines(rows, list(rows[0]))).encode(self.charset)
@@ -1,2 +1,3 @@
-from .notes import NoteSerializer
+from .notes import NoteIdListSerializer, NoteListSerializer, NoteSerializer
+from .tokens import TokenRefreshSerializer
 from .users import UserSerializer
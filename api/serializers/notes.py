@@ -1,4 +1,5 @@
 from core.models import Note
+from django.conf import settings
 from rest_framework import serializers
 
 
@@ -9,5 +10,27 @@ class NoteSerializer(serializers.ModelSerializer):
 
     # Ensure the note's user is the request's authenticated user
     def create(self, validated_data):
-        validated_data["author"] = self.context["request"].user
+        validated_data["author_id"] = self.context["request"].user.pk
         return super().create(validated_data)
+
+
+class NoteListSerializer(NoteSerializer):
+    """List representation: a short excerpt instead of the full content."""
+
+    class Meta(NoteSerializer.Meta):
+        fields = ["id", "title", "excerpt", "created_at"]
+
+
+class NoteIdListSerializer(serializers.Serializer):
+    """A batch of note ids, as sent to the bulk delete and fetch actions."""
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(),
+        allow_empty=False,
+        max_length=settings.NOTES_BULK_MAX_ITEMS,
+    )
+
+    def validate_ids(self, ids):
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Ids must be unique.")
+        return ids
@@ -0,0 +1,6 @@
+from api.tokens import FilteredRefreshToken
+from rest_framework_simplejwt import serializers
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    token_class = FilteredRefreshToken
@@ -1,12 +1,29 @@
+import csv
+import gzip
+import io
 import json
+import os
+import tempfile
 from datetime import timedelta
+from unittest import mock
 
+from api.blacklist import BloomFilter, blacklist_filter
+from api.throttling import UserTokenBucketThrottle
+from core.cache import note_list_cache
 from core.models import Note
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.timezone import now
 from rest_framework import status
+from rest_framework.settings import api_settings
 from rest_framework.test import APIClient, APITestCase
+from rest_framework.throttling import SimpleRateThrottle
 from users.models import AccountUser
 
 
@@ -17,6 +34,8 @@ class NotesAPITestCase(APITestCase):
         This will create a test user and test notes.
         """
         self.client = APIClient()
+        # Every test logs in from the same address; start with full buckets
+        cache.clear()
         # Create users
         self.user = AccountUser.objects.create_user(
             email_address="testuser@example.com", password="password123"
@@ -32,6 +51,7 @@ class NotesAPITestCase(APITestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.access_token = response.data["access"]
+        self.refresh_token = response.data["refresh"]
 
         # Set Authorization header for future requests
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access_token}")
@@ -104,6 +124,74 @@ class NotesAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["title"], self.note.title)
 
+    def test_token_user_is_not_loaded(self):
+        """Test that API requests trust the token instead of loading the user"""
+        self.client.get(self.notes_url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.note_detail_url)
+        self.assertFalse([q for q in queries if AccountUser._meta.db_table in q["sql"]])
+
+    def test_deactivated_user_is_rejected(self):
+        """Test that deactivating or deleting a user revokes API access"""
+        self.user.is_active = False
+        self.user.save()
+        response = self.client.get(self.notes_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(self.notes_url).status_code, 200)
+
+        self.user.delete()
+        response = self.client.get(self.notes_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_refresh_token_rotation(self):
+        """Test that a rotated refresh token cannot be used again"""
+        url = reverse("api-token-refresh")
+        response = self.client.post(url, data={"refresh": self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response.data["refresh"], self.refresh_token)
+
+        response = self.client.post(url, data={"refresh": self.refresh_token})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL=3600)
+    def test_refresh_skips_blacklist_lookup(self):
+        """Test that tokens missing from the filter skip the blacklist query"""
+        blacklist_filter.reset()
+        blacklist_filter.might_contain("warm-up")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse("api-token-refresh"), data={"refresh": self.refresh_token}
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The only blacklist queries left are the ones blacklisting the token
+        self.assertFalse([q for q in queries if "INNER JOIN" in q["sql"]])
+
+    def test_bloom_filter(self):
+        """Test that the Bloom filter has no false negatives"""
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f"jti-{i}")
+        self.assertTrue(all(f"jti-{i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 20)
+
+    def test_list_notes_returns_excerpts(self):
+        """Test that lists carry an excerpt and retrieve the full content"""
+        self.note.content = "word " * 2000
+        self.note.save()
+
+        response = self.client.get(self.notes_url)
+        item = next(n for n in response.data["results"] if n["id"] == str(self.note.pk))
+        self.assertNotIn("content", item)
+        self.assertLessEqual(len(item["excerpt"]), 300)
+        self.assertTrue(item["excerpt"].endswith("…"))
+
+        response = self.client.get(self.note_detail_url)
+        self.assertEqual(response.data["content"], self.note.content)
+
     def test_update_note(self):
         """Test updating a note"""
         data = {"title": "Updated Note", "content": "Updated content of the note."}
@@ -151,7 +239,7 @@ class NotesAPITestCase(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data["results"]), 1)
         self.assertEqual(
-            response.data["results"][0]["content"],
+            response.data["results"][0]["excerpt"],
             "This is the content of sample note 1.",
         )
 
@@ -193,3 +281,553 @@ class NotesAPITestCase(APITestCase):
         """Test deleting a non-existing note"""
         response = self.client.delete(reverse("note-detail", kwargs={"pk": 999}))
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_notes_cursor_pagination(self):
+        """Test that notes are paged with a cursor instead of page numbers"""
+        for i in range(12):
+            Note.objects.create(
+                title=f"Bulk Note {i}", content="Paged content", author=self.user
+            )
+
+        response = self.client.get(self.notes_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNone(response.data["previous"])
+        self.assertIsNotNone(response.data["next"])
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 4)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+
+    def test_list_notes_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        response = self.client.get(self.notes_url, {"cursor": "bogus"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_notes_phrase_and_prefix(self):
+        """Test phrase and prefix queries against the full-text index"""
+        Note.objects.create(
+            title="Weekly review",
+            content="Plan the quarterly roadmap",
+            author=self.user,
+        )
+        Note.objects.create(
+            title="Review weekly", content="Groceries", author=self.user
+        )
+
+        response = self.client.get(self.notes_url, {"search": '"weekly review"'})
+        self.assertEqual(
+            [note["title"] for note in response.data["results"]], ["Weekly review"]
+        )
+
+        response = self.client.get(self.notes_url, {"search": "quarter*"})
+        self.assertEqual(
+            [note["title"] for note in response.data["results"]], ["Weekly review"]
+        )
+
+    def test_search_notes_ranks_title_matches_first(self):
+        """Test that notes matching in the title outrank body-only matches"""
+        Note.objects.create(
+            title="Shopping", content="Buy a new umbrella", author=self.user
+        )
+        Note.objects.create(title="Umbrella", content="Red one", author=self.user)
+
+        response = self.client.get(self.notes_url, {"search": "umbrella"})
+        self.assertEqual(
+            [note["title"] for note in response.data["results"]],
+            ["Umbrella", "Shopping"],
+        )
+
+    def test_search_index_follows_updates(self):
+        """Test that edited notes are found by their new content only"""
+        self.client.patch(self.note_detail_url, data={"content": "Zanzibar trip"})
+
+        response = self.client.get(self.notes_url, {"search": "zanzibar"})
+        self.assertEqual(len(response.data["results"]), 1)
+        response = self.client.get(
+            self.notes_url, {"search": "content of sample note 1"}
+        )
+        self.assertEqual(len(response.data["results"]), 0)
+
+    @override_settings(NOTES_LIST_CACHE=True)
+    def test_list_notes_served_from_cache(self):
+        """Test that repeated list requests are cached until a note changes"""
+        self.client.get(self.notes_url)
+        hits = note_list_cache.stats.hits
+
+        # Nothing hits the database; the user comes from the token
+        with self.assertNumQueries(0):
+            response = self.client.get(self.notes_url)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(note_list_cache.stats.hits, hits + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.notes_url, data={"title": "Fresh", "content": "New"})
+        response = self.client.get(self.notes_url)
+        self.assertEqual(len(response.data["results"]), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.note_detail_url)
+        response = self.client.get(self.notes_url)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    @override_settings(NOTES_LIST_CACHE=True)
+    def test_list_cache_invalidated_on_commit(self):
+        """Test that a write only invalidates cached pages once it commits"""
+        version = note_list_cache.get_version(self.user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.client.post(self.notes_url, data={"title": "Fresh", "content": "New"})
+            self.assertEqual(note_list_cache.get_version(self.user.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(note_list_cache.get_version(self.user.pk), version)
+
+    def test_list_cache_disabled_for_local_memory(self):
+        """Test that pages are not cached when workers cannot share them"""
+        self.client.get(self.notes_url)
+        hits = note_list_cache.stats.hits
+        # The ETag summary and the page
+        with self.assertNumQueries(2):
+            self.client.get(self.notes_url)
+        self.assertEqual(note_list_cache.stats.hits, hits)
+
+    def test_retrieve_note_conditional_get(self):
+        """Test ETag / Last-Modified validators on a single note"""
+        response = self.client.get(self.note_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        self.assertIn("Last-Modified", response)
+
+        response = self.client.get(self.note_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b"")
+
+        response = self.client.get(
+            self.note_detail_url,
+            HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Any change produces a new validator
+        self.client.patch(self.note_detail_url, data={"title": "Changed"})
+        response = self.client.get(self.note_detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_notes_conditional_get(self):
+        """Test that unchanged list pages are answered with 304"""
+        response = self.client.get(self.notes_url)
+        etag = response["ETag"]
+
+        response = self.client.get(self.notes_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn("Last-Modified", response)
+
+        # Deleting a note changes the page, and with it the ETag
+        self.note2.delete()
+        response = self.client.get(self.notes_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+
+    def test_list_notes_not_modified_skips_serializer(self):
+        """Test that unchanged lists are answered from the summary alone"""
+        etag = self.client.get(self.notes_url)["ETag"]
+        with mock.patch(
+            "api.views.notes_views.NoteListSerializer.to_representation"
+        ) as to_representation, self.assertNumQueries(1):
+            response = self.client.get(self.notes_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        to_representation.assert_not_called()
+
+    @override_settings(NOTES_LIST_CACHE=True)
+    def test_list_notes_conditional_get_from_cache(self):
+        """Test that cached list pages are validated without any query"""
+        etag = self.client.get(self.notes_url)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.notes_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A write bumps the user's list version, and with it the ETag
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.note_detail_url, data={"content": "Edited"})
+        response = self.client.get(self.notes_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_create_notes(self):
+        """Test creating a batch of notes in one request"""
+        data = [{"title": f"Batch {i}", "content": "Synced"} for i in range(3)]
+        response = self.client.post(
+            reverse("note-bulk-create"), data=data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(
+            Note.objects.filter(author=self.user, title__startswith="Batch").count(),
+            3,
+        )
+        # Bulk created notes are searchable straight away
+        response = self.client.get(self.notes_url, {"search": "synced"})
+        self.assertEqual(len(response.data["results"]), 3)
+
+    def test_bulk_create_reports_errors_per_item(self):
+        """Test that one invalid item rejects the batch with per-item errors"""
+        data = [{"title": "Valid", "content": "Fine"}, {"title": "", "content": ""}]
+        response = self.client.post(
+            reverse("note-bulk-create"), data=data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0], {})
+        self.assertIn("title", response.data["errors"][1])
+        self.assertFalse(Note.objects.filter(title="Valid").exists())
+
+    def test_bulk_update_notes(self):
+        """Test partially updating several notes, scoped to the owner"""
+        data = [
+            {"id": str(self.note.pk), "title": "Bulk 1"},
+            {"id": str(self.note2.pk), "content": "Bulk content"},
+        ]
+        response = self.client.patch(
+            reverse("note-bulk-create"), data=data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.note.refresh_from_db()
+        self.note2.refresh_from_db()
+        self.assertEqual(self.note.title, "Bulk 1")
+        self.assertEqual(self.note2.content, "Bulk content")
+
+        data = [
+            {"id": str(self.note.pk), "title": "Not applied"},
+            {"id": str(self.other_note.pk), "title": "Hijacked"},
+        ]
+        response = self.client.patch(
+            reverse("note-bulk-create"), data=data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][1], {"id": ["Not found."]})
+        self.other_note.refresh_from_db()
+        self.assertEqual(self.other_note.title, "Other User Note")
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "Bulk 1")
+
+    def test_bulk_actions_reject_duplicate_ids(self):
+        """Test that a batch cannot name the same note twice"""
+        data = [
+            {"id": str(self.note.pk), "title": "First"},
+            {"id": str(self.note.pk), "title": "Second"},
+        ]
+        response = self.client.patch(
+            reverse("note-bulk-create"), data=data, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"], [{}, {"id": ["Duplicate id."]}])
+        self.note.refresh_from_db()
+        self.assertEqual(self.note.title, "Sample Note 1")
+
+        ids = [str(self.note.pk), str(self.note.pk)]
+        for name in ("note-bulk-delete", "note-fetch"):
+            response = self.client.post(reverse(name), data={"ids": ids}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(response.data["ids"], ["Ids must be unique."])
+        self.assertTrue(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_bulk_delete_notes(self):
+        """Test deleting a batch of notes by id"""
+        ids = [str(self.note.pk), str(self.other_note.pk)]
+        response = self.client.post(
+            reverse("note-bulk-delete"), data={"ids": ids}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["deleted"], 1)
+        self.assertEqual(response.data["not_found"], [str(self.other_note.pk)])
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+        self.assertTrue(Note.objects.filter(pk=self.other_note.pk).exists())
+
+    def test_fetch_notes_by_ids(self):
+        """Test fetching several notes at once"""
+        ids = [str(self.note2.pk), str(self.note.pk), str(self.other_note.pk)]
+        response = self.client.post(
+            reverse("note-fetch"), data={"ids": ids}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([note["id"] for note in response.data["results"]], ids[:2])
+        self.assertEqual(response.data["not_found"], [ids[2]])
+
+    def test_export_notes_ndjson(self):
+        """Test streaming a user's notes as NDJSON"""
+        response = self.client.get(reverse("note-export"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertEqual(
+            {row["title"] for row in rows}, {self.note.title, self.note2.title}
+        )
+
+    def test_export_notes_decompresses_content(self):
+        """Test that compressed note bodies are exported as text"""
+        self.note.content = "A whole pasted document. " * 1000
+        self.note.save()
+        response = self.client.get(reverse("note-export"))
+        rows = [
+            json.loads(line)
+            for line in b"".join(response.streaming_content).decode().splitlines()
+        ]
+        self.assertIn(self.note.content, [row["content"] for row in rows])
+
+    def test_export_notes_csv_gzip(self):
+        """Test streaming a gzipped CSV export"""
+        response = self.client.get(
+            reverse("note-export"), {"format": "csv", "compress": "gzip"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("notes.csv.gz", response["Content-Disposition"])
+
+        content = gzip.decompress(b"".join(response.streaming_content)).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]["content"], self.note.content)
+
+    def test_export_errors_rendered_like_exports(self):
+        """Test that export error responses use the export formats"""
+        self.client.credentials()
+        response = self.client.get(reverse("note-export"), {"format": "ndjson"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(json.loads(response.content), response.data)
+
+        response = self.client.get(reverse("note-export"), {"format": "csv"})
+        rows = list(csv.DictReader(io.StringIO(response.content.decode())))
+        self.assertEqual(rows, [dict(response.data)])
+
+    def test_import_notes_ndjson(self):
+        """Test importing notes and skipping invalid records"""
+        lines = [
+            json.dumps({"title": "Imported one", "content": "First"}),
+            "not json",
+            json.dumps({"title": "", "content": "Missing title"}),
+            json.dumps({"title": "Imported two", "content": "Second"}),
+        ]
+        upload = SimpleUploadedFile("notes.ndjson", "\n".join(lines).encode())
+        response = self.client.post(
+            reverse("note-import"), data={"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual(response.data["failed"], 2)
+        self.assertEqual([error["record"] for error in response.data["errors"]], [2, 3])
+        self.assertEqual(response.data["resume_from"], 4)
+
+        imported = Note.objects.filter(author=self.user, title__startswith="Imported")
+        self.assertEqual(imported.count(), 2)
+        response = self.client.get(reverse("note-list"), {"search": "imported"})
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_import_notes_csv_resume(self):
+        """Test resuming a CSV import after the records already imported"""
+        content = "title,content\nFirst,One\nSecond,Two\nThird,Three\n"
+        upload = SimpleUploadedFile("notes.csv", content.encode())
+        response = self.client.post(
+            f"{reverse('note-import')}?resume_from=2",
+            data={"file": upload},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 1)
+        self.assertTrue(Note.objects.filter(author=self.user, title="Third").exists())
+        self.assertFalse(Note.objects.filter(title="First").exists())
+
+    def test_import_notes_non_utf8(self):
+        """Test that undecodable NDJSON lines are reported as invalid records"""
+        lines = [
+            json.dumps({"title": "Imported one", "content": "First"}).encode(),
+            b'{"title": "Broken \xff", "content": "x"}',
+            json.dumps({"title": "Imported two", "content": "Second"}).encode(),
+        ]
+        upload = SimpleUploadedFile("notes.ndjson", b"\n".join(lines))
+        response = self.client.post(
+            reverse("note-import"), data={"file": upload}, format="multipart"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["created"], 2)
+        self.assertEqual([error["record"] for error in response.data["errors"]], [2])
+
+    def test_import_notes_unreadable_csv(self):
+        """Test that a CSV file that cannot be parsed stops with a 400"""
+        for content in (
+            b"title,content\nFirst,One\nSecond,Tw\xff\nThird,Three\n",
+            b'title,content\nFirst,One\nSecond,"' + b"x" * 200000 + b'"\n',
+        ):
+            Note.objects.filter(title="First").delete()
+            upload = SimpleUploadedFile("notes.csv", content)
+            response = self.client.post(
+                reverse("note-import"), data={"file": upload}, format="multipart"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertFalse(response.data["completed"])
+            self.assertEqual(response.data["resume_from"], 1)
+            self.assertIn("after line 2", response.data["error"])
+            self.assertTrue(Note.objects.filter(title="First").exists())
+
+    def test_import_notes_command_resumes_after_failure(self):
+        """Test that a failed batch stops the import at a resumable record"""
+        with tempfile.NamedTemporaryFile("w", suffix=".ndjson", delete=False) as f:
+            for number in range(5):
+                f.write(json.dumps({"title": f"Row {number}", "content": "x"}) + "\n")
+        self.addCleanup(os.remove, f.name)
+
+        bulk_create = Note.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(notes, *args, **kwargs):
+            calls.append(notes)
+            if len(calls) == 2:
+                raise DatabaseError("disk full")
+            return bulk_create(notes, *args, **kwargs)
+
+        options = {"user": self.user.email_address, "batch_size": 2}
+        with mock.patch.object(Note.objects, "bulk_create", fail_second_batch):
+            with self.assertRaisesMessage(CommandError, "--resume-from 2"):
+                call_command("import_notes", f.name, stdout=io.StringIO(), **options)
+        self.assertEqual(Note.objects.filter(title__startswith="Row").count(), 2)
+
+        call_command(
+            "import_notes", f.name, resume_from=2, stdout=io.StringIO(), **options
+        )
+        self.assertEqual(Note.objects.filter(title__startswith="Row").count(), 5)
+
+    def test_date_counts(self):
+        """Test the per date range note counts"""
+        Note.objects.filter(pk=self.note.pk).update(
+            created_at=timezone.now() - timedelta(days=3)
+        )
+        response = self.client.get(reverse("note-date-counts"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            {"today": 1, "yest": 0, "last-week": 2, "last-month": 2},
+        )
+
+    def test_login_throttle(self):
+        """Test that logins are limited per address, with rate limit headers"""
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "login": "2/minute"}
+        data = {"email_address": "testuser@example.com", "password": "password123"}
+        cache.clear()
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", rates):
+            response = self.client.post(reverse("api-login"), data)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["RateLimit-Limit"], "2")
+            self.assertEqual(response["RateLimit-Remaining"], "1")
+
+            self.client.post(reverse("api-login"), data)
+            response = self.client.post(reverse("api-login"), data)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["RateLimit-Remaining"], "0")
+        self.assertEqual(response["Retry-After"], "30")
+
+    def test_refresh_throttle(self):
+        """Test that token refreshes have their own bucket, not the anon one"""
+        rates = {
+            **api_settings.DEFAULT_THROTTLE_RATES,
+            "anon": "1/hour",
+            "refresh": "3/minute",
+        }
+        url = reverse("api-token-refresh")
+        refresh = self.refresh_token
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", rates):
+            for _ in range(3):
+                response = self.client.post(url, data={"refresh": refresh})
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response["RateLimit-Limit"], "3")
+                refresh = response.data["refresh"]
+            response = self.client.post(url, data={"refresh": refresh})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_note_write_throttle(self):
+        """Test that note writes have their own bucket and reads do not use it"""
+        rates = {**api_settings.DEFAULT_THROTTLE_RATES, "note_write": "1/minute"}
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", rates):
+            data = {"title": "Throttled", "content": "Content"}
+            response = self.client.post(self.notes_url, data)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post(self.notes_url, data)
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+            response = self.client.get(self.notes_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response["RateLimit-Limit"], "100")
+
+    def test_token_bucket_reset_keeps_concurrent_tokens(self):
+        """Test that refilling a bucket does not drop racing requests' tokens"""
+        throttle, racer = UserTokenBucketThrottle(), UserTokenBucketThrottle()
+        for bucket in (throttle, racer):
+            bucket.rate = "3/minute"
+            bucket.num_requests, bucket.duration = 3, 60
+            bucket.timer = lambda: 1_000_000.0
+        request = mock.Mock(user=self.user)
+        self.assertTrue(throttle.allow_request(request, mock.Mock(headers={})))
+        throttle.timer = racer.timer = lambda: 1_000_600.0
+
+        add = cache.add
+        raced = []
+
+        def add_after_racer(*args, **kwargs):
+            if not raced:
+                raced.append(True)
+                # Another request refills the bucket between our incr and add
+                self.assertTrue(racer.allow_request(request, mock.Mock(headers={})))
+            return add(*args, **kwargs)
+
+        with mock.patch.object(cache, "add", add_after_racer):
+            view = mock.Mock(headers={})
+            self.assertTrue(throttle.allow_request(request, view))
+        self.assertEqual(raced, [True])
+        self.assertEqual(view.headers["RateLimit-Remaining"], "1")
+        self.assertTrue(throttle.allow_request(request, mock.Mock(headers={})))
+        self.assertFalse(throttle.allow_request(request, mock.Mock(headers={})))
+
+    def test_token_bucket_keys_stay_bounded(self):
+        """Test that refilled buckets do not leave their old keys behind"""
+        throttle = UserTokenBucketThrottle()
+        throttle.rate = "3/minute"
+        throttle.num_requests, throttle.duration = 3, 60
+        request = mock.Mock(user=self.user)
+        now = 1_000_000.0
+        with mock.patch.object(throttle, "timer", lambda: now):
+            for _ in range(50):
+                self.assertTrue(throttle.allow_request(request, mock.Mock(headers={})))
+                now += 61
+        prefix = f"bucket_user_{self.user.pk}"
+        keys = [key for key in cache._cache if prefix in key]
+        # The generation and the current bucket
+        self.assertEqual(len(keys), 2)
+
+    def test_token_bucket_refills(self):
+        """Test that a drained bucket gives one token back per interval"""
+        throttle = UserTokenBucketThrottle()
+        throttle.rate = "3/minute"
+        throttle.num_requests, throttle.duration = 3, 60
+        request = mock.Mock(user=self.user)
+        view = mock.Mock(headers={})
+        now = 1_000_000.0
+        with mock.patch.object(throttle, "timer", lambda: now):
+            allowed = [throttle.allow_request(request, view) for _ in range(4)]
+            self.assertEqual(allowed, [True, True, True, False])
+            self.assertEqual(throttle.wait(), 20)
+
+            now += 20
+            self.assertTrue(throttle.allow_request(request, view))
+            self.assertFalse(throttle.allow_request(request, view))
+
+            now += 60
+            view = mock.Mock(headers={})
+            self.assertTrue(throttle.allow_request(request, view))
+            self.assertEqual(view.headers["RateLimit-Remaining"], "2")
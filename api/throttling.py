@@ -0,0 +1,132 @@
+"""
+Token-bucket throttles for the API.
+
+DRF's throttles keep every request timestamp of the period in the cache and
+rewrite the whole list on each request. These keep a single integer per
+client instead (the generic cell rate algorithm): the time in milliseconds
+at which the client's bucket will be full again. Taking a token is a read
+of the bucket's generation (see ``TokenBucketThrottle.take``) and one
+atomic ``cache.incr``, so concurrent requests of one client cannot both
+take the last token, and a client being rejected costs one more ``decr``.
+
+A rate of ``"10/minute"`` is a bucket of 10 tokens refilled at one token
+every 6 seconds. Every throttled response carries ``RateLimit-Limit``,
+``RateLimit-Remaining`` and ``RateLimit-Reset`` headers for the most
+depleted bucket, and ``429`` responses a ``Retry-After``.
+"""
+
+import math
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    ScopedRateThrottle,
+    SimpleRateThrottle,
+    UserRateThrottle,
+)
+
+# Buckets are kept this long after they were last refilled; expiry only
+# reclaims the memory of idle clients
+BUCKET_TIMEOUT = 24 * 3600
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    cache_format = "bucket_%(scope)s_%(ident)s"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        # Milliseconds between two tokens, and to refill the whole bucket
+        interval = max(1, round(self.duration * 1000 / self.num_requests))
+        capacity = interval * self.num_requests
+        now = int(self.timer() * 1000)
+
+        full_at = self.take(now, interval)
+        allowed = full_at - now <= capacity
+        if not allowed:
+            # Rejected requests do not use up tokens
+            self.cache.decr(self.bucket_key, interval)
+            full_at -= interval
+        self.wait_ms = max(0, full_at + interval - capacity - now)
+        self.report(
+            view,
+            remaining=max(0, (capacity - (full_at - now)) // interval),
+            reset=math.ceil(max(0, full_at - now) / 1000),
+        )
+        return allowed
+
+    def take(self, now, interval):
+        """
+        Take a token; returns the time at which the bucket is full again.
+
+        A bucket that filled up again cannot be reset to ``now`` with a
+        ``set``, which would drop the tokens taken by concurrent requests.
+        Each reset starts a new generation of the bucket instead: ``add``
+        lets exactly one request create it, and the others take their
+        tokens from it. That request then publishes the generation and
+        deletes the previous one, so a client never has more than the
+        generation and two buckets in the cache.
+        """
+        generation = self.cache.get(self.key) or 0
+        while True:
+            bucket_key = f"{self.key}_{generation}"
+            try:
+                full_at = self.cache.incr(bucket_key, interval)
+            except ValueError:
+                current = self.cache.get(self.key) or 0
+                if current > generation:
+                    # Replaced (and deleted) since the generation was read
+                    generation = current
+                    continue
+                if not self.cache.add(bucket_key, now + interval, BUCKET_TIMEOUT):
+                    # Created by a concurrent request; take a token from it
+                    continue
+                if generation:
+                    # Published before the old bucket goes, see above
+                    self.cache.set(self.key, generation, BUCKET_TIMEOUT)
+                    self.cache.delete(f"{self.key}_{generation - 1}")
+                full_at = now + interval
+            if full_at >= now + interval:
+                self.bucket_key = bucket_key
+                return full_at
+            # The bucket had filled up again since the client's last request
+            generation += 1
+
+    def report(self, view, remaining, reset):
+        """Set the rate limit headers, unless another bucket has fewer tokens."""
+        headers = view.headers
+        if int(headers.get("RateLimit-Remaining", remaining)) < remaining:
+            return
+        headers["RateLimit-Limit"] = str(self.num_requests)
+        headers["RateLimit-Remaining"] = str(remaining)
+        headers["RateLimit-Reset"] = str(reset)
+
+    def wait(self):
+        return self.wait_ms / 1000
+
+
+class AnonTokenBucketThrottle(AnonRateThrottle, TokenBucketThrottle):
+    """Limits unauthenticated clients by IP address, at the ``anon`` rate."""
+
+
+class UserTokenBucketThrottle(UserRateThrottle, TokenBucketThrottle):
+    """Limits each user (or unauthenticated IP address) at the ``user`` rate."""
+
+
+class ScopedTokenBucketThrottle(ScopedRateThrottle, TokenBucketThrottle):
+    """Limits views at the rate of their ``throttle_scope``."""
+
+
+class NoteWriteThrottle(UserTokenBucketThrottle):
+    """Limits each user's note writes, at the ``note_write`` rate."""
+
+    scope = "note_write"
+
+    def allow_request(self, request, view):
+        if request.method in SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
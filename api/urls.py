@@ -1,7 +1,12 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import CustomTokenObtainPairView, NoteViewSet, RegisterView
+from .views import (
+    CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    NoteViewSet,
+    RegisterView,
+)
 
 # Create a router and register the Note viewset
 router = DefaultRouter()
@@ -11,4 +16,6 @@ urlpatterns = [
     path("", include(router.urls)),  # Include all the routes generated by the router
     path("register/", RegisterView.as_view(), name="register"),  # User registration
     path("login/", CustomTokenObtainPairView.as_view(), name="api-login"),  # User login
+    # Exchange a refresh token for new tokens
+    path("login/refresh/", CustomTokenRefreshView.as_view(), name="api-token-refresh"),
 ]
@@ -1,2 +1,6 @@
 from .notes_views import NoteViewSet
-from .registration import CustomTokenObtainPairView, RegisterView
+from .registration import (
+    CustomTokenObtainPairView,
+    CustomTokenRefreshView,
+    RegisterView,
+)
@@ -1,30 +1,298 @@
+import uuid
+
+from api.exporters import export_notes
+from api.filters import NoteSearchFilter
+from api.importers import IMPORT_FORMATS, NoteImporter, guess_format, iter_records
+from api.mixins import CachedListMixin, ConditionalGetMixin
+from api.pagination import NoteKeysetPagination
 from api.permissions import IsOwner
-from api.serializers import NoteSerializer
+from api.renderers import CSVRenderer, NDJSONRenderer
+from api.serializers import NoteIdListSerializer, NoteListSerializer, NoteSerializer
+from api.throttling import NoteWriteThrottle
+from core.dates import count_by_date_range
 from core.models import Note
-from rest_framework import filters, viewsets
+from core.search import index_notes
+from core.signals import notes_changed
+from digithai_note_app.routers import replica_reads
+from django.conf import settings
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework import filters, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 
 
-class NoteViewSet(viewsets.ModelViewSet):
+class NoteViewSet(ConditionalGetMixin, CachedListMixin, viewsets.ModelViewSet):
     """
     A viewset that provides the standard actions to list, create, retrieve,
     update, and delete notes. It only allows authenticated users to interact
     with their own notes.
+
+    Unchanged notes and pages are answered with ``304 Not Modified`` and list
+    pages are served from the per-user note list cache.
     """
 
     serializer_class = NoteSerializer
     permission_classes = [IsAuthenticated, IsOwner]
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, NoteWriteThrottle]
+    pagination_class = NoteKeysetPagination
 
     def get_queryset(self):
         # Ensure users only see their own notes
-        return Note.objects.filter(author=self.request.user)
+        # Only the id is needed, so the request user may be a token user
+        queryset = Note.objects.filter(author_id=self.request.user.pk)
+        if self.action == "list":
+            # List pages only show excerpts, so the content is never loaded
+            queryset = queryset.only(
+                "id", "title", "excerpt", "created_at", "last_modified_at"
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == "list":
+            return NoteListSerializer
+        return super().get_serializer_class()
+
+    # Plain reads may come from the read replica; see digithai_note_app.routers
+
+    def list(self, request, *args, **kwargs):
+        with replica_reads(request.user.pk):
+            return super().list(request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        with replica_reads(request.user.pk):
+            return super().retrieve(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         # Set the user to the logged-in user
-        serializer.save(author=self.request.user)
+        serializer.save(author_id=self.request.user.pk)
+
+    # Batch actions used by clients syncing many notes at once. Each batch is
+    # validated item by item and, only if every item is valid, written in a
+    # single transaction. Errors are reported per item, in request order.
+
+    def get_bulk_serializer(self, *args, **kwargs):
+        kwargs["many"] = True
+        kwargs["max_length"] = settings.NOTES_BULK_MAX_ITEMS
+        return self.get_serializer(*args, **kwargs)
+
+    def after_bulk_write(self, notes):
+        index_notes(notes)
+        notes_changed.send(sender=Note, author_ids={self.request.user.pk})
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        serializer = self.get_bulk_serializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        notes = [
+            Note(author_id=request.user.pk, **item)
+            for item in serializer.validated_data
+        ]
+        with transaction.atomic():
+            Note.objects.bulk_create(notes)
+            self.after_bulk_write(notes)
+
+        data = self.get_serializer(notes, many=True).data
+        return Response({"results": data}, status=status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        items = request.data
+        max_items = settings.NOTES_BULK_MAX_ITEMS
+        if not isinstance(items, list) or not items:
+            error = "Expected a non-empty list of items."
+        elif len(items) > max_items:
+            error = f"Ensure this field has no more than {max_items} elements."
+        else:
+            error = None
+        if error:
+            return Response(
+                {"errors": {"non_field_errors": [error]}},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            ids = [self.parse_id(item) for item in items]
+            # Lock the rows so concurrent batches cannot interleave
+            owned = (
+                self.get_queryset()
+                .select_for_update()
+                .in_bulk([pk for pk in ids if pk is not None])
+            )
+
+            errors, notes, fields, seen = [], [], set(), set()
+            for pk, item in zip(ids, items):
+                note = owned.get(pk)
+                if note is None:
+                    errors.append({"id": ["Not found."]})
+                    continue
+                if pk in seen:
+                    errors.append({"id": ["Duplicate id."]})
+                    continue
+                seen.add(pk)
+                serializer = self.get_serializer(note, data=item, partial=True)
+                if not serializer.is_valid():
+                    errors.append(serializer.errors)
+                    continue
+                errors.append({})
+                for field, value in serializer.validated_data.items():
+                    setattr(note, field, value)
+                    fields.add(field)
+                notes.append(note)
+
+            if any(errors):
+                return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+            # bulk_update() does not run auto_now or pre_save, so stamp the
+            # change and refresh the excerpt here
+            now = timezone.now()
+            for note in notes:
+                note.last_modified_at = now
+                note.refresh_excerpt()
+            Note.objects.bulk_update(notes, [*fields, "excerpt", "last_modified_at"])
+            self.after_bulk_write(notes)
+
+        return Response({"results": self.get_serializer(notes, many=True).data})
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        serializer = NoteIdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+
+        with transaction.atomic():
+            queryset = self.get_queryset().filter(pk__in=ids)
+            found = set(queryset.values_list("pk", flat=True))
+            queryset.delete()
+            notes_changed.send(sender=Note, author_ids={request.user.pk})
+
+        return Response(
+            {
+                "deleted": len(found),
+                "not_found": [str(pk) for pk in ids if pk not in found],
+            }
+        )
+
+    @action(detail=False, methods=["post"], url_path="fetch")
+    def fetch(self, request):
+        serializer = NoteIdListSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data["ids"]
+
+        notes = self.get_queryset().in_bulk(ids)
+        return Response(
+            {
+                "results": self.get_serializer(
+                    [notes[pk] for pk in ids if pk in notes], many=True
+                ).data,
+                "not_found": [str(pk) for pk in ids if pk not in notes],
+            }
+        )
+
+    @action(detail=False, methods=["get"], url_path="date-counts")
+    def date_counts(self, request):
+        """
+        Number of notes created today, yesterday, in the last week and in the
+        last month, keyed by the ``type`` values of the web date filter.
+        """
+        with replica_reads(request.user.pk):
+            return Response(count_by_date_range(self.get_queryset()))
+
+    @action(
+        detail=False,
+        methods=["get"],
+        renderer_classes=[NDJSONRenderer, CSVRenderer],
+    )
+    def export(self, request):
+        """
+        Stream all of the user's notes, oldest first. Pick the format with
+        ``?format=ndjson`` (default) or ``?format=csv`` / the ``Accept``
+        header, and add ``?compress=gzip`` for a gzipped download.
+        """
+        renderer = request.accepted_renderer
+        gzip = request.query_params.get("compress") == "gzip"
+
+        filename = f"notes.{renderer.format}"
+        content_type = f"{renderer.media_type}; charset=utf-8"
+        if gzip:
+            filename += ".gz"
+            content_type = "application/gzip"
+
+        response = StreamingHttpResponse(
+            export_notes(
+                self.get_queryset(),
+                renderer.format,
+                gzip=gzip,
+                chunk_size=settings.NOTES_EXPORT_CHUNK_SIZE,
+            ),
+            content_type=content_type,
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=["post"],
+        url_path="import",
+        url_name="import",
+        parser_classes=[MultiPartParser],
+    )
+    def import_notes(self, request):
+        """
+        Import notes from an uploaded NDJSON or CSV ``file``. The format is
+        taken from ``file_format`` or the file extension. Valid records are
+        written in batches; pass the returned ``resume_from`` back as
+        ``?resume_from=`` to continue an interrupted import.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"file": ["No file was submitted."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.data.get("file_format") or guess_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            return Response(
+                {"file_format": [f"Expected one of: {', '.join(IMPORT_FORMATS)}."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        try:
+            start = max(int(request.query_params.get("resume_from", 0)), 0)
+        except ValueError:
+            return Response(
+                {"resume_from": ["A valid integer is required."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        importer = NoteImporter(
+            request.user.pk, batch_size=settings.NOTES_IMPORT_BATCH_SIZE
+        )
+        result = importer.run(iter_records(upload, file_format), start=start)
+        if result.unreadable:
+            return Response(result.as_dict(), status=status.HTTP_400_BAD_REQUEST)
+        if not result.completed:
+            # Committed batches stay; the client retries with resume_from
+            return Response(
+                result.as_dict(), status=status.HTTP_503_SERVICE_UNAVAILABLE
+            )
+        return Response(result.as_dict(), status=status.HTTP_201_CREATED)
+
+    @staticmethod
+    def parse_id(item):
+        try:
+            return uuid.UUID(str(item.get("id")))
+        except (AttributeError, TypeError, ValueError):
+            return None
 
     # Add filtering capabilities
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
-    search_fields = ["title", "content"]  # Allow filtering by title or content
+    # Full-text search runs last so it can rank results by relevance
+    filter_backends = [filters.OrderingFilter, NoteSearchFilter]
     ordering_fields = ["created_at"]  # Allow ordering by date
-    ordering = ["-created_at"]  # Default ordering by most recent
+    ordering = ["-created_at", "id"]  # Default ordering by most recent
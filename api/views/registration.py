@@ -1,9 +1,10 @@
 # notes_api/views.py
 
 from api.serializers import UserSerializer
+from api.throttling import ScopedTokenBucketThrottle
 from rest_framework import generics
 from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from users.models import AccountUser
 
 # class RegisterView(CreateAPIView):
@@ -16,9 +17,20 @@ class RegisterView(generics.CreateAPIView):
     queryset = AccountUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = (AllowAny,)
+    throttle_classes = (ScopedTokenBucketThrottle,)
+    throttle_scope = "register"
     # templates = "users/signup.html"
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     # This will allow customization of token claims if needed
-    pass
+    # Checked before the password is hashed
+    throttle_classes = (ScopedTokenBucketThrottle,)
+    throttle_scope = "login"
+
+
+class CustomTokenRefreshView(TokenRefreshView):
+    # Refreshes are unauthenticated and frequent (the access token lives
+    # minutes), so they get their own bucket instead of the "anon" one
+    throttle_classes = (ScopedTokenBucketThrottle,)
+    throttle_scope = "refresh"
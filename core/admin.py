@@ -1,13 +1,121 @@
+import uuid
+
 from core.models import Note
+from digithai_note_app.sites import admin_site
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
 from django.utils.translation import gettext_lazy as _
 from users.models import AccountUser
 
-from digithai_note_app.sites import admin_site
+from .dates import DateRange, get_date_filter
+from .pagination import EstimatedCountPaginator, InvalidCursor, KeysetPaginator
+from .search import search_notes
+
+CURSOR_VAR = "cursor"
+
+
+def parse_uuid(value):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        return None
+
+
+class KeysetChangeList(ChangeList):
+    """
+    A changelist paged with ``KeysetPaginator`` while it is shown in its
+    default order, so later pages cost the same as the first. Pages are
+    addressed by a ``cursor`` parameter; sorting by a column falls back to
+    regular numbered pages.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.keyset_page = None
+        self.result_count_estimated = False
+        self.previous_page_url = self.next_page_url = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_queryset(self, request, *args, **kwargs):
+        # The cursor is not a filter, and changing a filter starts over
+        self.params.pop(CURSOR_VAR, None)
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.model_admin.list_defer:
+            queryset = queryset.defer(*self.model_admin.list_defer)
+        return queryset
+
+    def uses_keyset(self):
+        return not (ORDER_VAR in self.params or self.show_all or self.list_editable)
+
+    def get_results(self, request):
+        if not self.uses_keyset():
+            super().get_results(request)
+            self.result_count_estimated = self.paginator.count_is_estimate
+            return
+
+        keyset = KeysetPaginator(
+            self.queryset, self.list_per_page, self.model_admin.keyset_ordering
+        )
+        try:
+            page = keyset.page(self.cursor)
+        except InvalidCursor:
+            raise IncorrectLookupParameters
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+
+        self.result_count = paginator.count
+        self.result_count_estimated = paginator.count_is_estimate
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.result_list = page.object_list
+        self.can_show_all = False
+        self.multi_page = page.has_other_pages()
+        self.paginator = paginator
+        self.keyset_page = page
+        if page.has_previous():
+            self.previous_page_url = self.get_query_string(
+                {CURSOR_VAR: page.previous_cursor}
+            )
+        if page.has_next():
+            self.next_page_url = self.get_query_string({CURSOR_VAR: page.next_cursor})
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Admin for tables with millions of rows: keyset paging in the default
+    ``keyset_ordering`` (which should match an index), estimated counts on
+    PostgreSQL and no unfiltered ``COUNT(*)``.
+    """
+
+    change_list_template = "admin/keyset_change_list.html"
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    keyset_ordering = ("-created_at", "id")
+    # Fields that are never shown in the list and need not be loaded
+    list_defer = ()
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class CreatedDateFilter(admin.SimpleListFilter):
+    title = _("creation date")
+    parameter_name = "created"
+
+    def lookups(self, request, model_admin):
+        return DateRange.CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(get_date_filter(self.value()))
+        return queryset
 
 
 @admin.register(AccountUser, site=admin_site)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "email_address",
@@ -16,13 +124,51 @@ class UserAdmin(admin.ModelAdmin):
         "last_name",
     )
     list_display_links = ("id",)
+    list_filter = ("is_active", "is_staff")
+    search_fields = ("email_address",)
+    search_help_text = _("Start of an email address, or an exact id.")
+    ordering = ("-date_joined",)
+    keyset_ordering = ("-date_joined", "id")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Only lookups that can use the unique email index or the primary key
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        pk = parse_uuid(search_term)
+        if pk is not None:
+            return queryset.filter(pk=pk), False
+        return queryset.filter(email_address__startswith=search_term), False
 
 
 @admin.register(Note, site=admin_site)
-class NoteAdmin(admin.ModelAdmin):
+class NoteAdmin(LargeTableAdmin):
     list_display = (
         "id",
         "author",
         "title",
+        "created_at",
     )
     list_display_links = ("id",)
+    list_select_related = ("author",)
+    list_filter = (CreatedDateFilter,)
+    # A select box would list every user
+    raw_id_fields = ("author",)
+    search_fields = ("title", "content")
+    search_help_text = _(
+        "Words from the title or content, an author's email address, or an id."
+    )
+    ordering = ("-created_at",)
+    list_defer = ("content",)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Full-text search instead of a LIKE scan over every note
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        pk = parse_uuid(search_term)
+        if pk is not None:
+            return queryset.filter(pk=pk), False
+        if "@" in search_term:
+            return queryset.filter(author__email_address=search_term), False
+        return search_notes(queryset, search_term, ranked=False), False
@@ -0,0 +1,168 @@
+"""
+Async implementations of the notes pages, used instead of ``core.views`` when
+the site is served over ASGI (``NOTES_ASYNC_VIEWS``).
+
+The views run on the event loop and query through the async ORM, so a worker
+is not tied up while a slow client waits. Django 4.2 has no async session or
+authentication API, so the user is still loaded in one thread hop per request.
+The notes cache may be a file or network cache, so it is only used through
+its async API or from a thread.
+"""
+
+from asgiref.sync import sync_to_async
+from digithai_note_app.routers import areplica_reads
+from django.contrib.auth.views import redirect_to_login
+from django.http import Http404
+from django.shortcuts import redirect, render
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.views import View
+
+from .cache import note_list_cache
+from .dates import acount_by_date_range
+from .forms import NoteForm
+from .models import Note
+from .pagination import InvalidCursor, KeysetPaginator
+from .views import (
+    get_date_ranges,
+    get_note_list_queryset,
+    get_page_cache_params,
+    get_pagination_query,
+)
+
+
+@sync_to_async
+def get_request_user(request):
+    # Resolves the lazy request.user (session and user lookups) in one hop
+    user = request.user
+    return user if user.is_authenticated else None
+
+
+class AsyncLoginRequiredView(View):
+    login_url = reverse_lazy("login")
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.user = await get_request_user(request)
+        if self.user is None:
+            return redirect_to_login(request.get_full_path(), self.login_url)
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get_note(self, pk):
+        # Ensure users can only view/edit their own notes
+        try:
+            return await Note.objects.aget(pk=pk, author_id=self.user.pk)
+        except Note.DoesNotExist:
+            raise Http404("No note found matching the query")
+
+
+class HomeView(AsyncLoginRequiredView):
+    template_name = "core/home.html"
+    paginate_by = 5
+
+    async def get(self, request):
+        # The list and its counts may come from the read replica
+        async with areplica_reads(self.user.pk):
+            return await self.render_list(NoteForm())
+
+    async def post(self, request):
+        form = NoteForm(request.POST)
+        if not form.is_valid():
+            return await self.render_list(form)
+
+        # Save the note with the current logged-in user as the author
+        note = form.save(commit=False)
+        note.author_id = self.user.pk
+        await note.asave()
+        return redirect("home")
+
+    async def get_page(self, paginator):
+        cache_key = await note_list_cache.amake_key(
+            "web", self.user.pk, get_page_cache_params(self.request.GET)
+        )
+        page = await note_list_cache.aget(cache_key)
+        if page is None:
+            try:
+                page = await paginator.apage(self.request.GET.get("cursor"))
+            except InvalidCursor:
+                raise Http404("Invalid cursor.")
+            await note_list_cache.aset(cache_key, page)
+        return page
+
+    async def get_date_counts(self):
+        cache_key = await note_list_cache.amake_key(
+            "dates", self.user.pk, str(timezone.localdate())
+        )
+        counts = await note_list_cache.aget(cache_key)
+        if counts is None:
+            counts = await acount_by_date_range(
+                Note.objects.filter(author_id=self.user.pk)
+            )
+            await note_list_cache.aset(cache_key, counts)
+        return counts
+
+    async def render_list(self, form):
+        if self.request.GET.get("search_note", "").strip():
+            # Searching may query the database (see core.search)
+            queryset = await sync_to_async(get_note_list_queryset)(
+                self.user.pk, self.request.GET
+            )
+        else:
+            queryset = get_note_list_queryset(self.user.pk, self.request.GET)
+        paginator = KeysetPaginator(queryset, self.paginate_by)
+        page = await self.get_page(paginator)
+        context = {
+            "form": form,
+            "notes": page.object_list,
+            "object_list": page.object_list,
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "search_query": self.request.GET.get("search", "").strip(),
+            "date_type": self.request.GET.get("type", ""),
+            "date_ranges": get_date_ranges(await self.get_date_counts()),
+            "pagination_query": get_pagination_query(self.request.GET),
+        }
+        # The note cards are read from and written to the notes cache
+        return await sync_to_async(render)(self.request, self.template_name, context)
+
+
+class NoteDetailEditView(AsyncLoginRequiredView):
+    template_name = "core/details_page.html"
+
+    async def get(self, request, pk):
+        note = await self.get_note(pk)
+        return self.render_note(note, NoteForm(instance=note))
+
+    async def post(self, request, pk):
+        note = await self.get_note(pk)
+        form = NoteForm(request.POST, instance=note)
+        if not form.is_valid():
+            return self.render_note(note, form)
+
+        await form.instance.asave()
+        return redirect(reverse("note_detail", kwargs={"pk": note.pk}))
+
+    def render_note(self, note, form):
+        context = {
+            "note": note,
+            "object": note,
+            "form": form,
+            "edit_mode": self.request.GET.get("edit", False),
+        }
+        return render(self.request, self.template_name, context)
+
+
+class NoteDeleteView(AsyncLoginRequiredView):
+    http_method_names = ["post"]
+
+    async def post(self, request, pk):
+        note = await self.get_note(pk)
+        await note.adelete()
+        return redirect("home")
+
+
+class CreateNoteView(AsyncLoginRequiredView):
+    template_name = "core/create_new_note.html"
+
+    async def get(self, request):
+        return render(request, self.template_name, {"form": NoteForm()})
@@ -0,0 +1,350 @@
+"""
+In-process benchmark of the notes pages and API, used by ``manage.py
+bench_notes``.
+
+A fixed random seed drives both the synthetic data and the requests, so two
+runs against the same code and settings are comparable.
+"""
+
+import json
+import platform
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.throttling import SimpleRateThrottle
+from rest_framework_simplejwt.tokens import RefreshToken
+from users.models import AccountUser
+
+from .models import Note
+from .search import index_notes
+
+BENCH_EMAIL_DOMAIN = "bench.invalid"
+BENCH_PASSWORD = "bench-password"
+
+WORDS = (
+    "meeting project review plan budget draft idea note call follow up weekly "
+    "team client report deadline summary task list shopping travel book "
+    "recipe garden health workout invoice contract design research release "
+    "bug feature roadmap quarter goal retro agenda decision question answer "
+    "update status launch hiring interview feedback training schedule trip "
+    "flight hotel dinner birthday gift reminder password backup server deploy "
+    "database query index cache latency memory profile benchmark test"
+).split()
+
+
+class DataGenerator:
+    """
+    Generates notes whose sizes follow a long-tailed distribution: mostly a
+    few sentences, some pages, and the occasional pasted document.
+    """
+
+    def __init__(self, rng):
+        self.rng = rng
+        # Notes are slices of one long random text, which is much faster than
+        # generating every note word by word
+        self.corpus = " ".join(rng.choices(WORDS, k=200_000))
+
+    def title(self):
+        return " ".join(self.rng.choices(WORDS, k=self.rng.randint(2, 8))).capitalize()
+
+    def content_size(self):
+        size = int(self.rng.lognormvariate(6, 1.2))  # median ~400 characters
+        if self.rng.random() < 0.02:
+            size = self.rng.randint(20_000, 100_000)
+        return max(20, min(size, len(self.corpus) - 1))
+
+    def content(self):
+        size = self.content_size()
+        start = self.rng.randrange(len(self.corpus) - size)
+        return self.corpus[start : start + size]
+
+
+def delete_bench_data():
+    return AccountUser.objects.filter(
+        email_address__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+    ).delete()[0]
+
+
+def seed(users, notes_per_user, rng, batch_size=1000):
+    """Create ``users`` users with ``notes_per_user`` notes each."""
+    generator = DataGenerator(rng)
+    # Hashing is deliberately slow, so every bench user shares one hash
+    password = make_password(BENCH_PASSWORD)
+    accounts = AccountUser.objects.bulk_create(
+        [
+            AccountUser(
+                email_address=f"user{i}@{BENCH_EMAIL_DOMAIN}", password=password
+            )
+            for i in range(users)
+        ],
+        batch_size=batch_size,
+    )
+
+    batch = []
+    for account in accounts:
+        for _ in range(notes_per_user):
+            batch.append(
+                Note(
+                    author_id=account.pk,
+                    title=generator.title(),
+                    content=generator.content(),
+                )
+            )
+            if len(batch) >= batch_size:
+                insert_notes(batch)
+                batch = []
+    insert_notes(batch)
+    return accounts
+
+
+def insert_notes(notes):
+    # bulk_create() still runs the field hooks that compress the content and
+    # fill the excerpt; the search index is updated separately
+    with transaction.atomic():
+        Note.objects.bulk_create(notes)
+        index_notes(notes)
+
+
+def percentile(cuts, p):
+    return cuts[p - 1] if cuts else None
+
+
+def summarize(latencies, queries, statuses, peak_memory):
+    latencies_ms = sorted(value / 1e6 for value in latencies)
+    cuts = (
+        statistics.quantiles(latencies_ms, n=100, method="inclusive")
+        if len(latencies_ms) > 1
+        else latencies_ms * 99
+    )
+    return {
+        "requests": len(latencies_ms),
+        "p50_ms": round(percentile(cuts, 50), 3),
+        "p95_ms": round(percentile(cuts, 95), 3),
+        "p99_ms": round(percentile(cuts, 99), 3),
+        "mean_ms": round(statistics.fmean(latencies_ms), 3),
+        "max_ms": round(latencies_ms[-1], 3),
+        "queries_per_request": round(statistics.fmean(queries), 2),
+        "peak_memory_kb": round(peak_memory / 1024, 1),
+        "statuses": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+class Scenario:
+    def __init__(self, name, make_request):
+        self.name = name
+        self.make_request = make_request
+
+    def run(self, requests, warmup):
+        for i in range(warmup):
+            self.make_request(i)
+
+        latencies, queries, statuses = [], [], []
+        for i in range(requests):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter_ns()
+                response = self.make_request(warmup + i)
+                latencies.append(time.perf_counter_ns() - started)
+            queries.append(len(captured))
+            statuses.append(response.status_code)
+
+        # Memory is traced in a separate, shorter pass: tracemalloc slows
+        # everything down and would distort the latencies
+        tracemalloc.start()
+        try:
+            peak = 0
+            for i in range(min(requests, 5)):
+                tracemalloc.reset_peak()
+                self.make_request(warmup + requests + i)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        return summarize(latencies, queries, statuses, peak)
+
+
+class NotesBenchmark:
+    def __init__(self, accounts, rng, clients=10):
+        self.rng = rng
+        self.accounts = accounts[:clients]
+        self.host = self.get_host()
+        self.web_clients = []
+        self.api_clients = []
+        for account in self.accounts:
+            web = Client(HTTP_HOST=self.host)
+            web.force_login(account)
+            self.web_clients.append(web)
+            token = RefreshToken.for_user(account).access_token
+            self.api_clients.append(
+                Client(HTTP_HOST=self.host, HTTP_AUTHORIZATION=f"Bearer {token}")
+            )
+        self.note_ids = [
+            list(Note.objects.filter(author_id=account.pk).values_list("pk", flat=True))
+            for account in self.accounts
+        ]
+
+    @staticmethod
+    def get_host():
+        hosts = settings.ALLOWED_HOSTS
+        if not hosts or "*" in hosts or "localhost" in hosts:
+            return "localhost"
+        return hosts[0].lstrip(".")
+
+    def client(self, clients, i):
+        return clients[i % len(clients)]
+
+    def note_url(self, i):
+        ids = self.note_ids[i % len(self.note_ids)]
+        return reverse("note-detail", kwargs={"pk": self.rng.choice(ids)})
+
+    def search_term(self):
+        return self.rng.choice(WORDS)
+
+    def scenarios(self):
+        anonymous = Client(HTTP_HOST=self.host)
+        web, api = self.web_clients, self.api_clients
+        return [
+            Scenario("web_home", lambda i: self.client(web, i).get(reverse("home"))),
+            Scenario(
+                "web_search",
+                lambda i: self.client(web, i).get(
+                    reverse("home"), {"search_note": self.search_term()}
+                ),
+            ),
+            Scenario(
+                "api_list", lambda i: self.client(api, i).get(reverse("note-list"))
+            ),
+            Scenario(
+                "api_retrieve", lambda i: self.client(api, i).get(self.note_url(i))
+            ),
+            Scenario(
+                "api_search",
+                lambda i: self.client(api, i).get(
+                    reverse("note-list"), {"search": self.search_term()}
+                ),
+            ),
+            Scenario(
+                "api_create",
+                lambda i: self.client(api, i).post(
+                    reverse("note-list"),
+                    {"title": f"Bench note {i}", "content": self.search_term() * 40},
+                    content_type="application/json",
+                ),
+            ),
+            Scenario(
+                "api_login",
+                lambda i: anonymous.post(
+                    reverse("api-login"),
+                    {
+                        "email_address": self.accounts[
+                            i % len(self.accounts)
+                        ].email_address,
+                        "password": BENCH_PASSWORD,
+                    },
+                ),
+            ),
+            Scenario(
+                "web_login",
+                lambda i: anonymous.post(
+                    reverse("login"),
+                    {
+                        "email_address": self.accounts[
+                            i % len(self.accounts)
+                        ].email_address,
+                        "password": BENCH_PASSWORD,
+                    },
+                ),
+            ),
+        ]
+
+    def run(self, requests, warmup, only=None):
+        results = {}
+        for scenario in self.scenarios():
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = scenario.run(requests, warmup)
+        return results
+
+
+def static_override():
+    """
+    Plain static storage when ``collectstatic`` has not been run, since the
+    manifest storage cannot render pages without its manifest.
+    """
+    manifest = getattr(staticfiles_storage, "manifest_name", None)
+    if manifest and not staticfiles_storage.exists(manifest):
+        return override_settings(
+            STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+        )
+    return override_settings()
+
+
+@contextmanager
+def throttling_disabled():
+    """The API rate limits would soon answer the benchmark with 429s."""
+    rates = SimpleRateThrottle.THROTTLE_RATES
+    SimpleRateThrottle.THROTTLE_RATES = dict.fromkeys(rates)
+    try:
+        yield
+    finally:
+        SimpleRateThrottle.THROTTLE_RATES = rates
+
+
+def run_benchmark(
+    users, notes_per_user, requests, warmup, seed_value=0, keep=False, only=None
+):
+    rng = random.Random(seed_value)
+    delete_bench_data()
+
+    started = time.perf_counter()
+    accounts = seed(users, notes_per_user, rng)
+    seed_seconds = time.perf_counter() - started
+
+    try:
+        with static_override(), throttling_disabled():
+            results = NotesBenchmark(accounts, rng).run(requests, warmup, only)
+    finally:
+        if not keep:
+            delete_bench_data()
+
+    total_notes = users * notes_per_user
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "seed": seed_value,
+            "users": users,
+            "notes_per_user": notes_per_user,
+            "requests": requests,
+            "warmup": warmup,
+            "argv": sys.argv[1:],
+        },
+        "seed": {
+            "notes": total_notes,
+            "seconds": round(seed_seconds, 3),
+            "notes_per_second": (
+                round(total_notes / seed_seconds) if seed_seconds else None
+            ),
+        },
+        "scenarios": results,
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def dumps(report):
+    return json.dumps(report, indent=2)
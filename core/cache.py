@@ -0,0 +1,169 @@
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class CacheStats:
+    """Thread-safe hit/miss counters for the current process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def reset(self):
+        with self._lock:
+            self.hits = self.misses = 0
+
+
+class NoteListCache:
+    """
+    Caches rendered pages of a user's note list.
+
+    Every user has a version number stored in the cache, and it is part of
+    every page key. Writing a note bumps the version once the write is
+    committed, so all of that user's cached pages become unreachable at once
+    without having to find and delete them; they simply expire.
+
+    Nothing is cached unless ``NOTES_LIST_CACHE`` is set, since the version
+    only works when all workers share the cache.
+    """
+
+    def __init__(self, alias="notes"):
+        self.alias = alias
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def enabled(self):
+        return settings.NOTES_LIST_CACHE
+
+    @property
+    def timeout(self):
+        return settings.NOTES_LIST_CACHE_TIMEOUT
+
+    def version_key(self, user_id):
+        return f"notes:version:{user_id}"
+
+    def get_version(self, user_id):
+        key = self.version_key(user_id)
+        version = self.cache.get(key)
+        if version is None:
+            # Seed from the clock rather than 1 so that a version evicted from
+            # the cache can never be reissued and revive stale pages
+            self.cache.add(key, time.time_ns(), timeout=None)
+            version = self.cache.get(key)
+        return version
+
+    async def aget_version(self, user_id):
+        key = self.version_key(user_id)
+        version = await self.cache.aget(key)
+        if version is None:
+            await self.cache.aadd(key, time.time_ns(), timeout=None)
+            version = await self.cache.aget(key)
+        return version
+
+    def bump_version(self, user_id):
+        if not self.enabled:
+            return
+        key = self.version_key(user_id)
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            self.cache.set(key, time.time_ns(), timeout=None)
+
+    def format_key(self, scope, user_id, version, params):
+        digest = hashlib.sha1(params.encode()).hexdigest()
+        return f"notes:{scope}:{user_id}:{version}:{digest}"
+
+    def make_key(self, scope, user_id, params):
+        version = self.get_version(user_id) if self.enabled else 0
+        return self.format_key(scope, user_id, version, params)
+
+    async def amake_key(self, scope, user_id, params):
+        version = await self.aget_version(user_id) if self.enabled else 0
+        return self.format_key(scope, user_id, version, params)
+
+    def get(self, key):
+        if not self.enabled:
+            return None
+        value = self.cache.get(key)
+        self.stats.record(hit=value is not None)
+        return value
+
+    async def aget(self, key):
+        if not self.enabled:
+            return None
+        value = await self.cache.aget(key)
+        self.stats.record(hit=value is not None)
+        return value
+
+    def set(self, key, value):
+        if self.enabled:
+            self.cache.set(key, value, self.timeout)
+
+    async def aset(self, key, value):
+        if self.enabled:
+            await self.cache.aset(key, value, self.timeout)
+
+    def get_or_set(self, key, default):
+        value = self.get(key)
+        if value is None:
+            value = default()
+            self.set(key, value)
+        return value
+
+
+class NoteCardCache:
+    """
+    Caches the rendered cards of the note list, one entry per note. The key
+    includes the note's ``last_modified_at``, so an edited note gets a new
+    entry and the old one simply expires.
+    """
+
+    def __init__(self, alias="notes"):
+        self.alias = alias
+        self.stats = CacheStats()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return settings.NOTE_CARD_CACHE_TIMEOUT
+
+    def make_key(self, note, *variant):
+        modified = note.last_modified_at.timestamp()
+        return ":".join(map(str, ("notes:card", note.pk, modified, *variant)))
+
+    def get_many(self, keys):
+        """The cached cards among ``keys``, in one cache round trip."""
+        found = self.cache.get_many(keys)
+        for key in keys:
+            self.stats.record(hit=key in found)
+        return found
+
+    def set_many(self, cards):
+        self.cache.set_many(cards, self.timeout)
+
+
+note_list_cache = NoteListCache()
+note_card_cache = NoteCardCache()
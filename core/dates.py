@@ -0,0 +1,91 @@
+"""
+The "created" date filters of the notes pages and API.
+
+Every range is a half-open interval of aware datetimes, ``start <= created_at
+< end``, computed from the current time zone's calendar days. Comparing the
+bare column (rather than ``created_at__date``) lets the database use the
+``(author, -created_at, id)`` index.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, Q
+from django.utils import timezone
+
+
+class DateRange:
+    TODAY = "today"
+    YESTERDAY = "yest"
+    LAST_WEEK = "last-week"
+    LAST_MONTH = "last-month"
+
+    CHOICES = (
+        (TODAY, "Today"),
+        (YESTERDAY, "Yesterday"),
+        (LAST_WEEK, "Last Week"),
+        (LAST_MONTH, "Last Month"),
+    )
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_date_bounds(date_type, today=None):
+    """
+    The ``(start, end)`` of a date range; ``end`` is None for ranges that run
+    up to now. Returns None for an unknown range.
+    """
+    today = today or timezone.localdate()
+    tomorrow = today + timedelta(days=1)
+    if date_type == DateRange.TODAY:
+        return start_of_day(today), start_of_day(tomorrow)
+    elif date_type == DateRange.YESTERDAY:
+        return start_of_day(today - timedelta(days=1)), start_of_day(today)
+    elif date_type == DateRange.LAST_WEEK:
+        return start_of_day(today - timedelta(weeks=1)), None
+    elif date_type == DateRange.LAST_MONTH:
+        return start_of_day(today - timedelta(days=30)), None
+    return None
+
+
+def get_date_filter(date_type, today=None):
+    bounds = get_date_bounds(date_type, today)
+    if bounds is None:
+        # Return an empty Q object if no valid date type
+        return Q()
+    start, end = bounds
+    if end is None:
+        return Q(created_at__gte=start)
+    return Q(created_at__gte=start, created_at__lt=end)
+
+
+def date_count_query(queryset):
+    """
+    The queryset and aggregates counting notes in every date range at once.
+    Only rows from the widest range are scanned.
+    """
+    today = timezone.localdate()
+    since = min(get_date_bounds(value, today)[0] for value, _ in DateRange.CHOICES)
+    aggregates = {
+        f"count_{i}": Count("pk", filter=get_date_filter(value, today))
+        for i, (value, _) in enumerate(DateRange.CHOICES)
+    }
+    return queryset.filter(created_at__gte=since), aggregates
+
+
+def date_counts_from_aggregates(result):
+    return {
+        value: result[f"count_{i}"] for i, (value, _) in enumerate(DateRange.CHOICES)
+    }
+
+
+def count_by_date_range(queryset):
+    """Number of notes in each ``DateRange``, in a single query."""
+    queryset, aggregates = date_count_query(queryset)
+    return date_counts_from_aggregates(queryset.aggregate(**aggregates))
+
+
+async def acount_by_date_range(queryset):
+    queryset, aggregates = date_count_query(queryset)
+    return date_counts_from_aggregates(await queryset.aaggregate(**aggregates))
@@ -0,0 +1,154 @@
+import zlib
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+from django.utils.text import Truncator
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# First byte of every value stored by CompressedTextField
+RAW = b"\x00"
+ZLIB = b"\x01"
+BROTLI = b"\x02"
+
+
+class CompressedPayload(bytes):
+    """A value of a ``CompressedTextField`` as stored, not decoded yet."""
+
+
+def compress_text(text):
+    """
+    Encode ``text`` for storage. Values of at least
+    ``NOTES_COMPRESSION_MIN_SIZE`` bytes are compressed, unless that would not
+    make them any smaller.
+    """
+    data = text.encode("utf-8")
+    if len(data) >= settings.NOTES_COMPRESSION_MIN_SIZE:
+        if settings.NOTES_COMPRESSION == "brotli" and brotli is not None:
+            packed = BROTLI + brotli.compress(data, quality=5)
+        else:
+            packed = ZLIB + zlib.compress(data, 6)
+        if len(packed) <= len(data):
+            return packed
+    return RAW + data
+
+
+def decompress_text(value):
+    """Decode a stored value. Plain strings are returned unchanged."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    header, data = value[:1], value[1:]
+    if header == ZLIB:
+        data = zlib.decompress(data)
+    elif header == BROTLI:
+        if brotli is None:
+            raise ImproperlyConfigured(
+                "The Brotli package is required to read brotli-compressed notes."
+            )
+        data = brotli.decompress(data)
+    elif header != RAW:
+        raise ValueError(f"Unknown compressed text header {header!r}")
+    return data.decode("utf-8")
+
+
+class ExcerptField(models.CharField):
+    """
+    A read-only, denormalized excerpt of another text field on the model.
+
+    The value is recomputed in ``pre_save`` so it follows ``save()`` and
+    ``bulk_create()``; code using ``bulk_update()`` or ``update()`` on the
+    source field must refresh it with ``refresh_excerpt``.
+    """
+
+    def __init__(self, source=None, *args, **kwargs):
+        self.source = source
+        kwargs.setdefault("max_length", 300)
+        kwargs.setdefault("blank", True)
+        kwargs.setdefault("default", "")
+        kwargs.setdefault("editable", False)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        for option, value in (("blank", True), ("default", ""), ("editable", False)):
+            if kwargs.get(option) == value:
+                del kwargs[option]
+        if kwargs.get("max_length") == 300:
+            del kwargs["max_length"]
+        return name, path, args, kwargs
+
+    def make_excerpt(self, text):
+        return Truncator(" ".join((text or "").split())).chars(self.max_length)
+
+    def refresh_excerpt(self, instance):
+        value = self.make_excerpt(getattr(instance, self.source))
+        setattr(instance, self.attname, value)
+        return value
+
+    def pre_save(self, model_instance, add):
+        return self.refresh_excerpt(model_instance)
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Decodes the stored payload on first access and keeps the result."""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedPayload):
+            value = decompress_text(value)
+            instance.__dict__[self.field.attname] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """
+    A text field stored as a binary column, compressed once it is large
+    enough (see ``compress_text``).
+
+    Loaded values stay compressed until the attribute is first read, and are
+    written back as is when they were not touched. ``values()`` and
+    ``values_list()`` return the stored payload; use ``decompress_text`` on
+    it. The column cannot be searched with SQL text lookups.
+    """
+
+    descriptor_class = CompressedTextDescriptor
+
+    def get_internal_type(self):
+        return "BinaryField"
+
+    def from_db_value(self, value, expression, connection):
+        if value is None or isinstance(value, str):
+            return value
+        return CompressedPayload(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress_text(value)
+        return super().to_python(value)
+
+    def pre_save(self, model_instance, add):
+        # Skip the descriptor so an untouched value is not decoded
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        if value is None:
+            return None
+        if not isinstance(value, CompressedPayload):
+            if not prepared:
+                value = self.get_prep_value(value)
+            value = compress_text(value)
+        return connection.Database.Binary(value)
@@ -0,0 +1,48 @@
+from core.bench import dumps, run_benchmark
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic users and notes, time the notes pages, API and login "
+        "endpoints in-process and print latency percentiles, queries per "
+        "request and memory as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--notes", type=int, default=200, help="Notes per user")
+        parser.add_argument(
+            "--requests", type=int, default=200, help="Timed requests per scenario"
+        )
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed")
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Only run this scenario (repeatable)",
+        )
+        parser.add_argument(
+            "--keep", action="store_true", help="Keep the seeded data afterwards"
+        )
+        parser.add_argument("--output", help="Write the JSON report to this file")
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["notes"] < 1 or options["requests"] < 1:
+            raise CommandError("--users, --notes and --requests must be positive.")
+
+        report = run_benchmark(
+            users=options["users"],
+            notes_per_user=options["notes"],
+            requests=options["requests"],
+            warmup=options["warmup"],
+            seed_value=options["seed"],
+            keep=options["keep"],
+            only=options["scenarios"],
+        )
+        output = dumps(report)
+        if options["output"]:
+            with open(options["output"], "w") as fileobj:
+                fileobj.write(output + "\n")
+        self.stdout.write(output)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.15 on 2026-10-18 13:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(
+                fields=["author", "-created_at", "id"], name="note_author_created_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from core.search import create_search_index
+
+    create_search_index(schema_editor)
+
+
+def drop_search_index(apps, schema_editor):
+    from core.search import drop_search_index
+
+    drop_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0003_note_author_created_idx"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.15 on 2026-10-18 14:04
+
+import core.fields
+from django.db import migrations
+
+
+def fill_excerpts(apps, schema_editor):
+    Note = apps.get_model("core", "Note")
+    field = Note._meta.get_field("excerpt")
+    batch = []
+    for note in Note.objects.only("id", "content").iterator(chunk_size=1000):
+        field.refresh_excerpt(note)
+        batch.append(note)
+        if len(batch) == 1000:
+            Note.objects.bulk_update(batch, ["excerpt"])
+            batch = []
+    Note.objects.bulk_update(batch, ["excerpt"])
+
+
+def rebuild_search_index(apps, schema_editor):
+    # SQLite rebuilds core_note to add or remove the column, which renumbers
+    # the rowids the full-text table is keyed on
+    from core.search import rebuild_search_index
+
+    rebuild_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0004_note_search_index"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, rebuild_search_index),
+        migrations.AddField(
+            model_name="note",
+            name="excerpt",
+            field=core.fields.ExcerptField(source="content"),
+        ),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.15 on 2026-10-18 14:32
+
+import core.fields
+from django.db import migrations, models
+
+
+def compress_contents(apps, schema_editor):
+    copy_contents(apps, "content", "content_compressed")
+
+
+def decompress_contents(apps, schema_editor):
+    copy_contents(apps, "content_compressed", "content")
+
+
+def copy_contents(apps, source, target):
+    Note = apps.get_model("core", "Note")
+    batch = []
+    for note in Note.objects.only("id", source).iterator(chunk_size=500):
+        setattr(note, target, getattr(note, source))
+        batch.append(note)
+        if len(batch) == 500:
+            Note.objects.bulk_update(batch, [target])
+            batch = []
+    Note.objects.bulk_update(batch, [target])
+
+
+def rebuild_search_index(apps, schema_editor):
+    # SQLite rebuilds core_note for these changes, which renumbers the rowids
+    # the full-text table is keyed on
+    from core.search import rebuild_search_index
+
+    rebuild_search_index(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0005_note_excerpt"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, rebuild_search_index),
+        migrations.AddField(
+            model_name="note",
+            name="content_compressed",
+            field=core.fields.CompressedTextField(default=""),
+            preserve_default=False,
+        ),
+        migrations.RunPython(compress_contents, decompress_contents),
+        # No database change; lets the column be re-added with an empty
+        # default when migrating backwards
+        migrations.AlterField(
+            model_name="note",
+            name="content",
+            field=models.TextField(blank=True),
+        ),
+        migrations.RemoveField(
+            model_name="note",
+            name="content",
+        ),
+        migrations.RenameField(
+            model_name="note",
+            old_name="content_compressed",
+            new_name="content",
+        ),
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.15 on 2026-10-18 15:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0006_note_compressed_content"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="note",
+            index=models.Index(fields=["-created_at", "id"], name="note_created_idx"),
+        ),
+    ]
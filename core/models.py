@@ -3,11 +3,40 @@ from django.db import models
 from django.utils import timezone
 from users.models import ObjectEventTracker, UUIDPrimaryKey
 
+from .fields import CompressedTextField, ExcerptField
+
 
 class Note(UUIDPrimaryKey, ObjectEventTracker):
     title = models.CharField(max_length=200)
-    content = models.TextField()
+    # Large bodies are stored compressed
+    content = CompressedTextField()
+    # Shown on list pages instead of the full content
+    excerpt = ExcerptField(source="content")
     author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            # Serves the per-author keyset pagination ordered by (-created_at, id)
+            models.Index(
+                fields=["author", "-created_at", "id"],
+                name="note_author_created_idx",
+            ),
+            # Serves the admin changelist, ordered by (-created_at, id)
+            models.Index(fields=["-created_at", "id"], name="note_created_idx"),
+        ]
+
     def __str__(self):
         return self.title
+
+    def save(self, *args, update_fields=None, **kwargs):
+        # Keep the excerpt in step when only the content is being saved
+        if update_fields is not None and "content" in update_fields:
+            update_fields = {*update_fields, "excerpt"}
+        # auto_now is only written when listed; cached cards are keyed by it
+        if update_fields:
+            update_fields = {*update_fields, "last_modified_at"}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+    def refresh_excerpt(self):
+        """Recompute the excerpt, for writes that bypass ``save()``."""
+        return self._meta.get_field("excerpt").refresh_excerpt(self)
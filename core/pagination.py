@@ -0,0 +1,201 @@
+import base64
+import binascii
+import datetime
+import json
+import uuid
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+DEFAULT_ORDERING = ("-created_at", "id")
+
+# Below this many rows (by the planner's estimate) an exact count is cheap
+EXACT_COUNT_LIMIT = 10_000
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _encode_value(value):
+    # DjangoJSONEncoder truncates datetimes to milliseconds, which would make
+    # the cursor skip rows created within the same millisecond.
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+class KeysetPage:
+    """
+    A single page of results produced by ``KeysetPaginator``.
+    It only holds plain data so it can be cached or pickled safely.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Seek-method paginator. Instead of ``COUNT(*)`` and ``OFFSET`` it remembers
+    the ordering values of the last row it returned and asks the database for
+    the rows that come after them, so every page costs the same as the first.
+
+    The ordering is taken from the queryset (or ``DEFAULT_ORDERING``) and is
+    always made unique by appending ``id`` as a tie-breaker.
+    """
+
+    def __init__(self, queryset, per_page, ordering=None):
+        self.per_page = per_page
+        self.ordering = self.get_ordering(queryset, ordering)
+        self.queryset = queryset.order_by(*self.ordering)
+
+    @staticmethod
+    def get_ordering(queryset, ordering=None):
+        ordering = list(ordering or queryset.query.order_by or DEFAULT_ORDERING)
+        if not all(isinstance(field, str) for field in ordering):
+            raise ValueError("Keyset pagination only supports ordering by field names.")
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            # Break ties on the primary key so the position is always unique.
+            # (-created_at, id) and its mirror (created_at, -id) both match
+            # the composite index, so pick the direction accordingly.
+            ordering.append("id" if ordering[0].startswith("-") else "-id")
+        return tuple(ordering)
+
+    def encode_cursor(self, obj, reverse=False):
+        values = [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        payload = json.dumps({"v": values, "r": reverse}, default=_encode_value)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            values, reverse = payload["v"], bool(payload["r"])
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise InvalidCursor("Invalid cursor")
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor("Invalid cursor")
+        return values, reverse
+
+    def seek_filter(self, values, reverse=False):
+        """
+        Build the ``WHERE`` clause selecting the rows after ``values``:
+        ``(a < x) OR (a = x AND b < y) OR ...``, plus a redundant range
+        condition on the leading column so the index can be range-scanned.
+        """
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-") != reverse
+            lookup = "lt" if descending else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+
+        leading = self.ordering[0].lstrip("-")
+        leading_lookup = "lte" if self.ordering[0].startswith("-") != reverse else "gte"
+        return Q(**{f"{leading}__{leading_lookup}": values[0]}) & condition
+
+    def reversed_ordering(self):
+        return tuple(
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        )
+
+    def get_page_queryset(self, cursor=None):
+        if not cursor:
+            return self.queryset, False
+
+        values, reverse = self.decode_cursor(cursor)
+        queryset = self.queryset.filter(self.seek_filter(values, reverse))
+        if reverse:
+            queryset = queryset.order_by(*self.reversed_ordering())
+        return queryset, reverse
+
+    def build_page(self, rows, cursor, reverse):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or reverse:
+                next_cursor = self.encode_cursor(rows[-1])
+            if (has_more and reverse) or (cursor and not reverse):
+                previous_cursor = self.encode_cursor(rows[0], reverse=True)
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        queryset, reverse = self.get_page_queryset(cursor)
+        # Fetch one extra row to find out whether there is another page
+        rows = list(queryset[: self.per_page + 1])
+        return self.build_page(rows, cursor, reverse)
+
+    async def apage(self, cursor=None):
+        queryset, reverse = self.get_page_queryset(cursor)
+        rows = [row async for row in queryset[: self.per_page + 1]]
+        return self.build_page(rows, cursor, reverse)
+
+
+def estimate_count(queryset):
+    """
+    The number of rows in ``queryset`` and whether it is an estimate.
+
+    On PostgreSQL large results are not counted: the size of a whole table
+    comes from its statistics in ``pg_class`` and that of a filtered query
+    from the planner's row estimate. Elsewhere, and for small results, the
+    rows are counted exactly.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return queryset.count(), False
+
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        estimate = int(row[0]) if row else -1
+    else:
+        plan = json.loads(queryset.order_by().explain(format="json"))
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+
+    # reltuples is -1 for a table that was never analyzed
+    if estimate < EXACT_COUNT_LIMIT:
+        return queryset.count(), False
+    return estimate, True
+
+
+class EstimatedCountPaginator(Paginator):
+    """A ``Paginator`` whose ``count`` comes from ``estimate_count()``."""
+
+    count_is_estimate = False
+
+    @cached_property
+    def count(self):
+        count, self.count_is_estimate = estimate_count(self.object_list)
+        return count
@@ -0,0 +1,317 @@
+"""
+Full-text search for notes.
+
+PostgreSQL keeps a weighted ``tsvector`` column on ``core_note`` behind a GIN
+index, SQLite keeps an FTS5 shadow table keyed by the note's ``rowid``. Both
+are created by migration ``core.0004_note_search_index`` and kept up to date
+through ``index_notes``; other databases fall back to scanning the searched
+notes in Python, which queries the database as soon as the search is applied.
+
+Queries support quoted phrases (``"weekly review"``) and prefixes
+(``meet*``); all terms must match. Results are annotated with
+``search_rank`` where a higher value means a better match.
+"""
+
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Value
+from django.db.models.expressions import RawSQL
+
+from .fields import decompress_text
+from .models import Note
+
+TOKEN_RE = re.compile(r'"([^"]*)"?|(\S+)')
+WORD_RE = re.compile(r"\w+")
+
+IndexEntry = namedtuple("IndexEntry", ["pk", "title", "content"])
+
+SQLITE_FTS_TABLE = "core_note_fts"
+
+# Schema changes applied by migrations. The SQLite shadow table is keyed by
+# the note's rowid; Django rebuilds tables on SQLite for some schema changes
+# (which renumbers rows and drops triggers), so such migrations must run
+# ``rebuild_search_index`` afterwards. Existing rows are indexed by
+# ``populate_search_index`` since the content column is compressed and
+# cannot be read in SQL.
+POSTGRES_CREATE = [
+    "ALTER TABLE core_note ADD COLUMN IF NOT EXISTS search_vector tsvector",
+    "CREATE INDEX IF NOT EXISTS note_search_vector_idx "
+    "ON core_note USING GIN (search_vector)",
+]
+POSTGRES_DROP = [
+    "DROP INDEX IF EXISTS note_search_vector_idx",
+    "ALTER TABLE core_note DROP COLUMN IF EXISTS search_vector",
+]
+SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE core_note_fts USING fts5("
+    "title, content, tokenize='porter unicode61 remove_diacritics 2')",
+    # Deletes (including cascades from users) never go through Note.save(),
+    # so the shadow table cleans up after itself
+    "CREATE TRIGGER core_note_fts_delete AFTER DELETE ON core_note BEGIN "
+    "DELETE FROM core_note_fts WHERE rowid = old.rowid; END",
+]
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS core_note_fts_delete",
+    "DROP TABLE IF EXISTS core_note_fts",
+]
+
+
+def _run_schema(schema_editor, postgres, sqlite):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": postgres, "sqlite": sqlite}.get(vendor, [])
+    params = {"config": settings.NOTES_SEARCH_CONFIG}
+    for statement in statements:
+        schema_editor.execute(statement, params if "%(" in statement else None)
+
+
+def create_search_index(schema_editor):
+    _run_schema(schema_editor, POSTGRES_CREATE, SQLITE_CREATE)
+    populate_search_index(schema_editor.connection)
+
+
+def populate_search_index(connection, batch_size=1000):
+    """
+    Index every note. Raw rows are read in primary key order, so this works
+    from migrations whatever the current model looks like.
+    """
+    backend = get_search_backend(connection.alias)
+    if isinstance(backend, FallbackSearchBackend):
+        return
+    sql = f"SELECT id, title, content FROM {backend.table}"
+    last_pk = None
+    with connection.cursor() as cursor:
+        while True:
+            if last_pk is None:
+                cursor.execute(f"{sql} ORDER BY id LIMIT %s", [batch_size])
+            else:
+                cursor.execute(
+                    f"{sql} WHERE id > %s ORDER BY id LIMIT %s", [last_pk, batch_size]
+                )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            backend.index(
+                IndexEntry(pk, title, decompress_text(content))
+                for pk, title, content in rows
+            )
+            last_pk = rows[-1][0]
+
+
+def drop_search_index(schema_editor):
+    _run_schema(schema_editor, POSTGRES_DROP, SQLITE_DROP)
+
+
+def rebuild_search_index(schema_editor):
+    drop_search_index(schema_editor)
+    create_search_index(schema_editor)
+
+
+class SearchTerm:
+    def __init__(self, words, prefix=False):
+        self.words = tuple(words)
+        self.prefix = prefix
+
+    def __repr__(self):
+        return f"SearchTerm({self.words!r}, prefix={self.prefix!r})"
+
+
+def parse_query(text):
+    """
+    Split a user query into terms. Only word characters survive, so the
+    terms can be safely rendered into either backend's query syntax.
+    """
+    terms = []
+    for match in TOKEN_RE.finditer(text or ""):
+        phrase, token = match.groups()
+        words = WORD_RE.findall(phrase if phrase is not None else token)
+        if not words:
+            continue
+        prefix = phrase is None and token.endswith("*")
+        terms.append(SearchTerm(words, prefix))
+    return terms
+
+
+class BaseSearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @property
+    def table(self):
+        return self.connection.ops.quote_name(Note._meta.db_table)
+
+    def search(self, queryset, terms):
+        raise NotImplementedError
+
+    def index(self, notes):
+        """Refresh the search index entries of ``notes``."""
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    vector_sql = (
+        "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+        "setweight(to_tsvector(%s::regconfig, %s), 'B')"
+    )
+
+    @property
+    def config(self):
+        return settings.NOTES_SEARCH_CONFIG
+
+    def to_tsquery(self, terms):
+        parts = []
+        for term in terms:
+            words = list(term.words)
+            if term.prefix:
+                words[-1] += ":*"
+            parts.append("(%s)" % " <-> ".join(words))
+        return " & ".join(parts)
+
+    def search(self, queryset, terms):
+        params = (self.config, self.to_tsquery(terms))
+        vector = f"{self.table}.search_vector"
+        return queryset.annotate(
+            search_rank=RawSQL(
+                f"ts_rank({vector}, to_tsquery(%s::regconfig, %s))",
+                params,
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                f"{vector} @@ to_tsquery(%s::regconfig, %s)",
+                params,
+                output_field=BooleanField(),
+            )
+        )
+
+    def index(self, notes):
+        pk_field = Note._meta.pk
+        rows = [
+            (
+                self.config,
+                note.title,
+                self.config,
+                note.content,
+                pk_field.get_db_prep_value(note.pk, self.connection),
+            )
+            for note in notes
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {self.table} SET search_vector = {self.vector_sql} "
+                "WHERE id = %s",
+                rows,
+            )
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    def to_match(self, terms):
+        parts = []
+        for term in terms:
+            phrase = '"%s"' % " ".join(term.words)
+            parts.append(phrase + "*" if term.prefix else phrase)
+        return " ".join(parts)
+
+    def search(self, queryset, terms):
+        match = self.to_match(terms)
+        fts = SQLITE_FTS_TABLE
+        return queryset.annotate(
+            # bm25() is lower for better matches; titles weigh 10x the body
+            search_rank=RawSQL(
+                f"(SELECT -bm25({fts}, 10.0, 1.0) FROM {fts} "
+                f"WHERE {fts} MATCH %s AND {fts}.rowid = {self.table}.rowid)",
+                (match,),
+                output_field=FloatField(),
+            )
+        ).filter(
+            RawSQL(
+                f"{self.table}.rowid IN (SELECT rowid FROM {fts} WHERE {fts} MATCH %s)",
+                (match,),
+                output_field=BooleanField(),
+            )
+        )
+
+    def index(self, notes):
+        pk_field = Note._meta.pk
+        rows = [
+            (
+                note.title,
+                note.content,
+                pk_field.get_db_prep_value(note.pk, self.connection),
+            )
+            for note in notes
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT OR REPLACE INTO {SQLITE_FTS_TABLE} (rowid, title, content) "
+                f"SELECT rowid, %s, %s FROM {self.table} WHERE id = %s",
+                rows,
+            )
+
+
+class FallbackSearchBackend(BaseSearchBackend):
+    """
+    Substring matching for databases without a full-text index. Note bodies
+    are stored compressed and cannot be matched in SQL, so the candidate
+    notes are scanned here and the queryset is narrowed to the matches.
+    """
+
+    chunk_size = 2000
+
+    def search(self, queryset, terms):
+        texts = [" ".join(term.words).casefold() for term in terms]
+        rows = queryset.order_by().values_list("pk", "title", "content")
+        matches = []
+        for pk, title, content in rows.iterator(chunk_size=self.chunk_size):
+            title = title.casefold()
+            body = None
+            for text in texts:
+                if text in title:
+                    continue
+                # Only bodies that are needed are decompressed
+                if body is None:
+                    body = decompress_text(content).casefold()
+                if text not in body:
+                    break
+            else:
+                matches.append(pk)
+        return queryset.filter(pk__in=matches).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        )
+
+
+BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    connection = connections[using]
+    return BACKENDS.get(connection.vendor, FallbackSearchBackend)(connection)
+
+
+def search_notes(queryset, query, ranked=True):
+    """
+    Restrict ``queryset`` to the notes matching ``query``. When ``ranked``
+    the results are ordered best match first, newest first among equals.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return queryset
+
+    queryset = get_search_backend(queryset.db).search(queryset, terms)
+    if ranked:
+        queryset = queryset.order_by("-search_rank", "-created_at", "id")
+    return queryset
+
+
+def index_notes(notes, using="default"):
+    """
+    Update the search index for ``notes``. Called for every saved note and
+    by code paths that bypass ``Model.save()`` such as ``bulk_create``.
+    """
+    notes = list(notes)
+    if notes:
+        get_search_backend(using).index(notes)
@@ -0,0 +1,44 @@
+from digithai_note_app.routers import pin_to_primary
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .cache import note_list_cache
+from .models import Note
+from .search import index_notes
+
+# Sent whenever notes of the given authors were created, changed or deleted.
+# Code paths that bypass Model.save()/delete(), such as bulk operations,
+# must send it themselves.
+notes_changed = Signal()
+
+
+@receiver(post_save, sender=Note)
+def update_search_index(sender, instance, using, update_fields=None, **kwargs):
+    # Only re-index when the searchable text may have changed
+    if update_fields is not None and not {"title", "content"} & set(update_fields):
+        return
+    index_notes([instance], using=using)
+
+
+@receiver(post_save, sender=Note)
+@receiver(post_delete, sender=Note)
+def note_saved_or_deleted(sender, instance, **kwargs):
+    notes_changed.send(sender=Note, author_ids={instance.author_id})
+
+
+@receiver(notes_changed)
+def invalidate_note_lists(sender, author_ids, **kwargs):
+    # Only once the write is visible: bumping earlier would let a concurrent
+    # request cache the rows from before it under the new version
+    def bump_versions():
+        for author_id in author_ids:
+            note_list_cache.bump_version(author_id)
+
+    transaction.on_commit(bump_versions)
+
+
+@receiver(notes_changed)
+def pin_authors_to_primary(sender, author_ids, **kwargs):
+    # Their next reads must not come from a replica that lags behind
+    pin_to_primary(author_ids)
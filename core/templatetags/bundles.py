@@ -0,0 +1,19 @@
+from digithai_note_app.bundling import bundle_files
+from django import template
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+
+@register.simple_tag
+def bundle(name):
+    """
+    The ``<link>`` or ``<script>`` tags of a ``STATIC_BUNDLES`` entry: the
+    bundle itself once collected, otherwise the files it is built from.
+    """
+    if name.endswith(".css"):
+        tag = '<link rel="stylesheet" href="{}">'
+    else:
+        tag = '<script src="{}"></script>'
+    return format_html_join("\n", tag, ((static(path),) for path in bundle_files(name)))
@@ -0,0 +1,44 @@
+from django import template
+from django.template.backends.utils import csrf_input
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+from ..cache import note_card_cache
+
+register = template.Library()
+
+CARD_COLORS = ("info", "warning", "danger", "purple", "primary", "success")
+
+# Cached cards hold this in place of the CSRF field, which differs per request
+CSRF_PLACEHOLDER = "<!-- csrf_input -->"
+
+
+@register.simple_tag(takes_context=True)
+def note_cards(context, notes):
+    """
+    The cards of ``notes``. Cards are cached per note, and all of a page's
+    cards are fetched with one ``get_many``; only the missing ones are
+    rendered.
+    """
+    language = get_language()
+    cards = [(note, CARD_COLORS[i % len(CARD_COLORS)]) for i, note in enumerate(notes)]
+    keys = [note_card_cache.make_key(note, color, language) for note, color in cards]
+    found = note_card_cache.get_many(keys)
+
+    rendered = {}
+    for key, (note, color) in zip(keys, cards):
+        if key not in found:
+            rendered[key] = render_to_string(
+                "core/note_card.html",
+                {
+                    "note": note,
+                    "color": color,
+                    "csrf_input": mark_safe(CSRF_PLACEHOLDER),
+                },
+            )
+    if rendered:
+        note_card_cache.set_many(rendered)
+
+    html = "".join(found.get(key) or rendered[key] for key in keys)
+    return mark_safe(html.replace(CSRF_PLACEHOLDER, csrf_input(context["request"])))
@@ -1,6 +1,25 @@
+import io
+import json
+import re
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from core import async_views
+from core.cache import note_card_cache, note_list_cache
+from core.dates import DateRange, count_by_date_range, get_date_filter, start_of_day
+from core.fields import CompressedPayload
 from core.models import Note
-from django.test import TestCase
-from django.urls import reverse
+from core.search import FallbackSearchBackend, parse_query
+from core.templatetags.notes import CSRF_PLACEHOLDER
+from core.urls import notes_urlpatterns
+from digithai_note_app.routers import pin_to_primary
+from digithai_note_app.timing import install_query_recorders
+from django.core.management import call_command
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
 from django.utils import timezone
 from users.models import AccountUser
 
@@ -84,3 +103,501 @@ class NoteDeleteViewTests(NoteAppTests):
         )
         self.assertEqual(response.status_code, 302)
         self.assertFalse(Note.objects.filter(pk=self.note1.pk).exists())
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class HomeViewPaginationTests(NoteAppTests):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(10):
+            Note.objects.create(
+                title=f"Paged Note {i}", content="Paged content", author=self.user
+            )
+
+    def test_pages_follow_cursor(self):
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        first_page = response.context["page_obj"]
+        self.assertEqual(len(first_page), 5)
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+
+        seen = [note.pk for note in first_page]
+        cursor = first_page.next_cursor
+        while cursor:
+            response = self.client.get(reverse("home"), {"cursor": cursor})
+            page = response.context["page_obj"]
+            self.assertTrue(page.has_previous())
+            seen.extend(note.pk for note in page)
+            cursor = page.next_cursor
+
+        # Every note is listed exactly once, newest first
+        expected = list(
+            Note.objects.filter(author=self.user)
+            .order_by("-created_at", "id")
+            .values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first_page = self.client.get(reverse("home")).context["page_obj"]
+        second_page = self.client.get(
+            reverse("home"), {"cursor": first_page.next_cursor}
+        ).context["page_obj"]
+        back = self.client.get(
+            reverse("home"), {"cursor": second_page.previous_cursor}
+        ).context["page_obj"]
+        self.assertEqual([n.pk for n in back], [n.pk for n in first_page])
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("home"), {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class HomeViewSearchTests(NoteAppTests):
+
+    def test_search_notes(self):
+        response = self.client.get(reverse("home"), {"search_note": "note 1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [note.pk for note in response.context["notes"]], [self.note1.pk]
+        )
+
+    def test_search_ignores_deleted_notes(self):
+        self.note1.delete()
+        response = self.client.get(reverse("home"), {"search_note": "content"})
+        self.assertEqual(
+            [note.pk for note in response.context["notes"]], [self.note2.pk]
+        )
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class HomeViewDateFilterTests(NoteAppTests):
+
+    def setUp(self):
+        super().setUp()
+        yesterday = start_of_day(timezone.localdate() - timezone.timedelta(days=1))
+        self.yesterday_note = self.create_note("Yesterday", yesterday)
+        self.old_note = self.create_note("Old", timezone.now() - timedelta(days=10))
+        self.older_note = self.create_note("Older", timezone.now() - timedelta(days=40))
+
+    def create_note(self, title, created_at):
+        note = Note.objects.create(title=title, content="Dated", author=self.user)
+        # created_at is auto_now_add, so it can only be changed afterwards
+        Note.objects.filter(pk=note.pk).update(created_at=created_at)
+        return note
+
+    def listed(self, date_type):
+        response = self.client.get(reverse("home"), {"type": date_type})
+        return {note.pk for note in response.context["notes"]}
+
+    def test_date_filters(self):
+        today = {self.note1.pk, self.note2.pk}
+        self.assertEqual(self.listed(DateRange.TODAY), today)
+        self.assertEqual(self.listed(DateRange.YESTERDAY), {self.yesterday_note.pk})
+        self.assertEqual(
+            self.listed(DateRange.LAST_WEEK), today | {self.yesterday_note.pk}
+        )
+        self.assertEqual(
+            self.listed(DateRange.LAST_MONTH),
+            today | {self.yesterday_note.pk, self.old_note.pk},
+        )
+
+    def test_filters_compare_the_column(self):
+        # A date cast around created_at would keep the index from being used
+        queryset = Note.objects.filter(get_date_filter(DateRange.YESTERDAY))
+        self.assertNotIn("cast", str(queryset.query).lower())
+
+    def test_counts_use_one_query(self):
+        with self.assertNumQueries(1):
+            counts = count_by_date_range(Note.objects.filter(author=self.user))
+        self.assertEqual(
+            counts,
+            {
+                DateRange.TODAY: 2,
+                DateRange.YESTERDAY: 1,
+                DateRange.LAST_WEEK: 3,
+                DateRange.LAST_MONTH: 4,
+            },
+        )
+
+    def test_home_shows_counts(self):
+        response = self.client.get(reverse("home"), {"type": DateRange.YESTERDAY})
+        self.assertIn(
+            (DateRange.LAST_MONTH, "Last Month", 4), response.context["date_ranges"]
+        )
+        self.assertContains(response, '<option value="yest" selected>Yesterday (1)')
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+    NOTES_LIST_CACHE=True,
+)
+class HomeViewCacheTests(NoteAppTests):
+
+    def test_updates_invalidate_cached_page(self):
+        self.client.get(reverse("home"))
+        response = self.client.get(reverse("home"))
+        self.assertEqual(len(response.context["notes"]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("note_detail", kwargs={"pk": self.note1.pk}),
+                data={"title": "Renamed", "content": "Content for note 1"},
+            )
+        response = self.client.get(reverse("home"))
+        self.assertIn("Renamed", [note.title for note in response.context["notes"]])
+        self.assertContains(response, '<h4 class="card-title">Renamed</h4>')
+
+    def test_cards_come_from_one_cache_lookup(self):
+        self.client.get(reverse("home"))
+        with mock.patch.object(
+            note_card_cache, "get_many", wraps=note_card_cache.get_many
+        ) as get_many, mock.patch(
+            "core.templatetags.notes.render_to_string"
+        ) as render_to_string:
+            response = self.client.get(reverse("home"))
+        get_many.assert_called_once()
+        render_to_string.assert_not_called()
+
+        # Each card's delete forms get this request's CSRF field
+        self.assertNotContains(response, CSRF_PLACEHOLDER)
+        delete_forms = re.findall(
+            r'class="delete-form"[^>]*>\s*<input type="hidden" '
+            r'name="csrfmiddlewaretoken"',
+            response.content.decode(),
+        )
+        self.assertEqual(len(delete_forms), 2 * len(response.context["notes"]))
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class NoteExcerptTests(NoteAppTests):
+
+    def test_excerpt_follows_content(self):
+        self.note1.content = "A long   paragraph\n" * 100
+        self.note1.save(update_fields=["content"])
+        self.note1.refresh_from_db()
+        self.assertTrue(self.note1.excerpt.startswith("A long paragraph A long"))
+        self.assertLessEqual(len(self.note1.excerpt), 300)
+
+    def test_home_shows_excerpts(self):
+        self.note1.content = "Lorem ipsum " * 500
+        self.note1.save()
+        response = self.client.get(reverse("home"))
+        self.assertContains(response, self.note1.excerpt)
+        self.assertNotContains(response, self.note1.content)
+
+
+class CompressedContentTests(NoteAppTests):
+
+    def stored_size(self, note):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT length(content) FROM core_note WHERE id = %s", [note.pk.hex]
+            )
+            return cursor.fetchone()[0]
+
+    def test_large_content_is_stored_compressed(self):
+        self.note1.content = "A paragraph of a long document. " * 500
+        self.note1.save()
+        self.assertLess(self.stored_size(self.note1), len(self.note1.content) // 10)
+        # Short bodies are stored as they are, behind a one byte header
+        self.assertEqual(self.stored_size(self.note2), len(self.note2.content) + 1)
+
+    def test_content_is_decompressed_on_access(self):
+        self.note1.content = "Lazily decoded text. " * 500
+        self.note1.save()
+
+        note = Note.objects.get(pk=self.note1.pk)
+        self.assertIsInstance(note.__dict__["content"], CompressedPayload)
+        self.assertEqual(note.content, self.note1.content)
+        self.assertIsInstance(note.__dict__["content"], str)
+
+    def test_fallback_search_matches_compressed_content(self):
+        self.note1.content = "A long body that ends with hello world. " * 100
+        self.note1.save()
+        self.assertLess(self.stored_size(self.note1), len(self.note1.content))
+
+        backend = FallbackSearchBackend(connection)
+        notes = Note.objects.filter(author=self.user)
+        found = backend.search(notes, parse_query("WORLD"))
+        self.assertEqual([note.pk for note in found], [self.note1.pk])
+        found = backend.search(notes, parse_query('"note 2" cont*'))
+        self.assertEqual([note.pk for note in found], [self.note2.pk])
+        self.assertFalse(backend.search(notes, parse_query("world missing")))
+
+
+class AsyncURLConf:
+    # The site's URLs with the async notes views in front
+    urlpatterns = [
+        path("", include(notes_urlpatterns(async_views))),
+        path("", include("digithai_note_app.urls")),
+    ]
+
+
+@override_settings(
+    ROOT_URLCONF=AsyncURLConf,
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class AsyncNoteViewTests(NoteAppTests):
+
+    def setUp(self):
+        super().setUp()
+        self.other_user = AccountUser.objects.create_user(
+            email_address="other@example.com", password="testpass"
+        )
+        self.other_note = Note.objects.create(
+            title="Other note", content="Not yours", author=self.other_user
+        )
+        self.async_client.force_login(self.user)
+
+    async def test_home_lists_notes(self):
+        response = await self.async_client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {note.pk for note in response.context["notes"]},
+            {self.note1.pk, self.note2.pk},
+        )
+
+    @override_settings(NOTES_LIST_CACHE=True)
+    async def test_home_uses_async_cache_api(self):
+        blocking = AssertionError("Blocking cache call on the event loop")
+        with mock.patch.object(
+            note_list_cache, "get", side_effect=blocking
+        ), mock.patch.object(note_list_cache, "set", side_effect=blocking):
+            await self.async_client.get(reverse("home"))
+            hits = note_list_cache.stats.hits
+            response = await self.async_client.get(reverse("home"))
+        self.assertEqual(len(response.context["notes"]), 2)
+        # The page and the date counts
+        self.assertEqual(note_list_cache.stats.hits, hits + 2)
+
+    async def test_home_reads_replica_pin_asynchronously(self):
+        with mock.patch(
+            "digithai_note_app.routers.replica_configured", lambda: True
+        ), mock.patch(
+            "digithai_note_app.routers.is_pinned",
+            side_effect=AssertionError("Blocking cache call on the event loop"),
+        ):
+            # Pinned, so the reads stay on the primary the tests run against
+            await sync_to_async(pin_to_primary)([self.user.pk])
+            response = await self.async_client.get(reverse("home"))
+        self.assertEqual(response.status_code, 200)
+
+    async def test_home_requires_login(self):
+        response = await AsyncClient().get(reverse("home"))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(response.url.startswith(reverse("login")))
+
+    async def test_create_note(self):
+        response = await self.async_client.post(
+            reverse("home"), {"title": "Async note", "content": "Created"}
+        )
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+        note = await Note.objects.aget(title="Async note")
+        self.assertEqual(note.author_id, self.user.pk)
+
+    async def test_update_note(self):
+        url = reverse("note_detail", kwargs={"pk": self.note1.pk})
+        response = await self.async_client.get(url)
+        self.assertContains(response, self.note1.content)
+
+        await self.async_client.post(url, {"title": "Renamed", "content": "New"})
+        note = await Note.objects.aget(pk=self.note1.pk)
+        self.assertEqual(note.title, "Renamed")
+
+    async def test_other_users_notes_are_hidden(self):
+        url = reverse("note_detail", kwargs={"pk": self.other_note.pk})
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.post(
+            reverse("note_delete", kwargs={"pk": self.other_note.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    async def test_delete_note(self):
+        await self.async_client.post(
+            reverse("note_delete", kwargs={"pk": self.note1.pk})
+        )
+        self.assertFalse(await Note.objects.filter(pk=self.note1.pk).aexists())
+
+
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class AdminChangelistTests(TestCase):
+
+    def setUp(self):
+        self.admin = AccountUser.objects.create_superuser(
+            email_address="admin@example.com", password="testpass"
+        )
+        self.client.force_login(self.admin)
+        self.authors = [
+            AccountUser.objects.create_user(
+                email_address=f"author{i}@example.com", password="testpass"
+            )
+            for i in range(3)
+        ]
+        for i in range(12):
+            Note.objects.create(
+                title=f"Admin note {i}",
+                content=f"Body {i}",
+                author=self.authors[i % 3],
+            )
+        self.url = reverse("admin:core_note_changelist")
+
+    def test_authors_are_selected_with_the_notes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        note_queries = [q["sql"] for q in queries if '"core_note"' in q["sql"]]
+        # One page query (with the authors joined) and one count
+        self.assertEqual(len(note_queries), 2)
+        self.assertTrue(any('"users_accountuser"' in sql for sql in note_queries))
+
+    def test_keyset_pages(self):
+        seen = []
+        url = self.url
+        with mock.patch("core.admin.NoteAdmin.list_per_page", 5):
+            while url:
+                response = self.client.get(url)
+                cl = response.context["cl"]
+                self.assertEqual(cl.result_count, 12)
+                seen.extend(note.pk for note in cl.result_list)
+                url = cl.next_page_url and self.url + cl.next_page_url
+
+        expected = list(
+            Note.objects.order_by("-created_at", "id").values_list("pk", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertContains(response, "Previous")
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"cursor": "nope"})
+        self.assertRedirects(response, f"{self.url}?e=1", fetch_redirect_response=False)
+
+    def test_sorting_by_column_uses_numbered_pages(self):
+        response = self.client.get(self.url, {"o": "3"})
+        self.assertIsNone(response.context["cl"].keyset_page)
+        self.assertEqual(response.context["cl"].result_count, 12)
+
+    def test_search(self):
+        response = self.client.get(self.url, {"q": "body"})
+        self.assertEqual(len(response.context["cl"].result_list), 12)
+
+        note = Note.objects.get(title="Admin note 4")
+        response = self.client.get(self.url, {"q": str(note.pk)})
+        self.assertEqual(list(response.context["cl"].result_list), [note])
+
+        response = self.client.get(self.url, {"q": self.authors[1].email_address})
+        self.assertEqual(
+            {n.author_id for n in response.context["cl"].result_list},
+            {self.authors[1].pk},
+        )
+
+    def test_date_filter(self):
+        Note.objects.filter(title="Admin note 0").update(
+            created_at=timezone.now() - timedelta(days=40)
+        )
+        response = self.client.get(self.url, {"created": DateRange.LAST_MONTH})
+        self.assertEqual(response.context["cl"].result_count, 11)
+
+    def test_user_search_by_email_prefix(self):
+        response = self.client.get(
+            reverse("admin:users_accountuser_changelist"), {"q": "author"}
+        )
+        self.assertEqual(set(response.context["cl"].result_list), set(self.authors))
+
+
+def server_timing(response):
+    metrics = {}
+    for entry in response.headers["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@override_settings(
+    REQUEST_TIMING=True,
+    REQUEST_TIMING_SLOW_MS=10_000,
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class RequestTimingTests(NoteAppTests):
+
+    def test_server_timing_header(self):
+        with self.assertLogs("digithai_note_app.requests", "INFO") as logs:
+            response = self.client.get(reverse("home"))
+
+        metrics = server_timing(response)
+        self.assertEqual(set(metrics), {"db", "tpl", "view", "total"})
+        self.assertGreater(float(metrics["tpl"]["dur"]), 0)
+        self.assertRegex(metrics["db"]["desc"], r'^"[1-9]\d* queries"$')
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(logs.records[0].levelname, "INFO")
+        self.assertEqual(record["route"], "home")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(f'"{record["queries"]} queries"', metrics["db"]["desc"])
+        self.assertNotIn("sql", record)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    def test_slow_requests_log_sql(self):
+        with self.assertLogs("digithai_note_app.requests", "WARNING") as logs:
+            self.client.get(reverse("home"))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(len(record["sql"]), record["queries"])
+        self.assertTrue(any("core_note" in query["sql"] for query in record["sql"]))
+
+    @override_settings(ROOT_URLCONF=AsyncURLConf)
+    async def test_async_views_are_measured(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        # The test connection was opened long before the middleware was
+        # loaded, in the thread the async ORM runs its queries in
+        await sync_to_async(install_query_recorders)()
+        with self.assertLogs("digithai_note_app.requests", "INFO") as logs:
+            response = await self.async_client.get(reverse("home"))
+
+        record = json.loads(logs.records[0].getMessage())
+        self.assertIn("Server-Timing", response.headers)
+        self.assertGreater(record["queries"], 0)
+        self.assertGreater(record["template_ms"], 0)
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", response.headers)
+
+
+class BenchNotesCommandTests(TestCase):
+
+    def test_bench_report(self):
+        out = io.StringIO()
+        call_command(
+            "bench_notes",
+            users=2,
+            notes=5,
+            requests=3,
+            warmup=1,
+            scenarios=["web_home", "api_retrieve"],
+            stdout=out,
+        )
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["seed"]["notes"], 10)
+        self.assertEqual(set(report["scenarios"]), {"web_home", "api_retrieve"})
+        result = report["scenarios"]["api_retrieve"]
+        self.assertEqual(result["statuses"], {"200": 3})
+        self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+        # The seeded data is removed afterwards
+        self.assertFalse(Note.objects.exists())
@@ -1,14 +1,21 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import CreateNoteView, HomeView, NoteDeleteView, NoteDetailEditView
-
-urlpatterns = [
-    path("", HomeView.as_view(), name="home"),
-    path("note/create", CreateNoteView.as_view(), name="create_note"),
-    path(
-        "note/<uuid:pk>/delete/",
-        NoteDeleteView.as_view(),
-        name="note_delete",
-    ),
-    path("note/<uuid:pk>/", NoteDetailEditView.as_view(), name="note_detail"),
-]
+from . import async_views, views
+
+
+def notes_urlpatterns(views):
+    return [
+        path("", views.HomeView.as_view(), name="home"),
+        path("note/create", views.CreateNoteView.as_view(), name="create_note"),
+        path(
+            "note/<uuid:pk>/delete/",
+            views.NoteDeleteView.as_view(),
+            name="note_delete",
+        ),
+        path("note/<uuid:pk>/", views.NoteDetailEditView.as_view(), name="note_detail"),
+    ]
+
+
+# Served over ASGI the pages use the async views (see asgi.py)
+urlpatterns = notes_urlpatterns(async_views if settings.NOTES_ASYNC_VIEWS else views)
@@ -1,5 +1,4 @@
-from datetime import timedelta
-
+from digithai_note_app.routers import replica_reads
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db.models import Q
 from django.http import Http404
@@ -14,15 +13,60 @@ from django.views.generic import (
     UpdateView,
 )
 
+from .cache import note_list_cache
+from .dates import DateRange, count_by_date_range, get_date_filter
 from .forms import NoteForm, NoteUpdateForm
 from .models import Note
+from .pagination import InvalidCursor, KeysetPaginator
+from .search import search_notes
+
+
+def get_note_list_queryset(user_id, params):
+    """The notes shown on the home page for the given query parameters."""
+    # Initialize the base queryset
+    queryset = (
+        Note.objects.all()
+        .filter(author_id=user_id)
+        .order_by("-created_at", "id")
+        # Cards only show the excerpt, so the content is never loaded
+        .only("id", "title", "excerpt", "created_at", "last_modified_at")
+    )
+    search_query = params.get("search_note", "").strip()
+    date_type = params.get("type", "")
+
+    filters = Q()
+
+    # Add date filters based on selected type
+    if date_type:
+        filters &= get_date_filter(date_type)
+
+    # Full-text search, best matches first
+    return search_notes(queryset.filter(filters), search_query)
+
+
+def get_page_cache_params(params):
+    # The date is part of the key since the date filters are relative
+    return f"{timezone.localdate()}?{params.urlencode()}"
+
+
+def get_page_cache_key(user_id, params):
+    return note_list_cache.make_key("web", user_id, get_page_cache_params(params))
+
+
+def get_date_counts_cache_key(user_id):
+    return note_list_cache.make_key("dates", user_id, str(timezone.localdate()))
 
 
-class DateRange:
-    TODAY = "today"
-    YESTERDAY = "yest"
-    LAST_WEEK = "last-week"
-    LAST_MONTH = "last-month"
+def get_date_ranges(counts):
+    """The date filter choices with their note counts, for the template."""
+    return [(value, label, counts[value]) for value, label in DateRange.CHOICES]
+
+
+def get_pagination_query(params):
+    # Keep the active filters when following the pagination links
+    params = params.copy()
+    params.pop("cursor", None)
+    return params.urlencode()
 
 
 class HomeView(LoginRequiredMixin, CreateView, ListView):
@@ -34,47 +78,41 @@ class HomeView(LoginRequiredMixin, CreateView, ListView):
     login_url = reverse_lazy("login")
     paginate_by = 5
 
-    def get_queryset(self):
-        # Initialize the base queryset
-        queryset = (
-            Note.objects.all().filter(author=self.request.user).order_by("-created_at")
-        )
-        search_query = self.request.GET.get("search_note", "").strip()
-        date_type = self.request.GET.get("type", "")
-
-        filters = Q()
+    def get(self, request, *args, **kwargs):
+        # The list and its counts may come from the read replica
+        with replica_reads(request.user.pk):
+            return super().get(request, *args, **kwargs)
 
-        # Add filters based on search query
-        if search_query:
-            filters &= Q(title__icontains=search_query) | Q(
-                content__icontains=search_query
+    def get_queryset(self):
+        return get_note_list_queryset(self.request.user.pk, self.request.GET)
+
+    def paginate_queryset(self, queryset, page_size):
+        # Keyset pagination: pages are addressed by a cursor instead of a
+        # page number, so no COUNT(*) or OFFSET scan is needed
+        paginator = KeysetPaginator(queryset, page_size)
+        cache_key = get_page_cache_key(self.request.user.pk, self.request.GET)
+        try:
+            page = note_list_cache.get_or_set(
+                cache_key, lambda: paginator.page(self.request.GET.get("cursor"))
             )
-
-        # Add date filters based on selected type
-        if date_type:
-            filters &= self.get_date_filter(date_type)
-
-        return queryset.filter(filters)
-
-    def get_date_filter(self, date_type):
-        today = timezone.now().date()
-        if date_type == DateRange.TODAY:
-            return Q(created_at__date=today)
-        elif date_type == DateRange.YESTERDAY:
-            return Q(created_at__date=today - timedelta(days=1))
-        elif date_type == DateRange.LAST_WEEK:
-            return Q(created_at__date__gte=today - timedelta(weeks=1))
-        elif date_type == DateRange.LAST_MONTH:
-            return Q(created_at__date__gte=today - timedelta(days=30))
-
-        # Return an empty Q object if no valid date type
-        return Q()
+        except InvalidCursor:
+            raise Http404("Invalid cursor.")
+        return (paginator, page, page.object_list, page.has_other_pages())
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["form"] = self.get_form()
         context["search_query"] = self.request.GET.get("search", "").strip()
         context["date_type"] = self.request.GET.get("type", "")
+        # Badge counts for all date filters, from one cached query
+        counts = note_list_cache.get_or_set(
+            get_date_counts_cache_key(self.request.user.pk),
+            lambda: count_by_date_range(
+                Note.objects.filter(author_id=self.request.user.pk)
+            ),
+        )
+        context["date_ranges"] = get_date_ranges(counts)
+        context["pagination_query"] = get_pagination_query(self.request.GET)
         return context
 
     def form_valid(self, form):
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'digithai_note_app.settings')
+# Serve the notes pages with their async views
+os.environ.setdefault('NOTES_ASYNC_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,187 @@
+"""
+Static bundles, built by ``collectstatic``.
+
+Each entry of ``STATIC_BUNDLES`` maps a bundle name (e.g.
+``"bundles/app.css"``) to the static files it is made of. When the files
+are collected, ``BundledStaticFilesStorage`` concatenates and minifies them
+and drops icon rules (``.ri-search-line:before{content:"..."}``) whose class
+is not used by any template or bundled script. The bundles then go through
+WhiteNoise like any other file: they get a hashed name, which WhiteNoise
+serves with an immutable ``Cache-Control``, and ``.gz`` siblings (and
+``.br`` ones when Brotli is installed).
+
+Templates include bundles with ``{% bundle %}`` (``core.templatetags``),
+which falls back to the separate files when the storage does not build
+bundles, e.g. in development.
+"""
+
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from django.template import engines
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+CSS_COMMENT_OR_STRING = re.compile(
+    r"""/\*.*?\*/|("(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*')""", re.DOTALL
+)
+CSS_URL = re.compile(r"""url\(\s*(["']?)([^"')]+)\1\s*\)""")
+ICON_SELECTOR = re.compile(r"^\.([\w-]+)::?before$")
+ICON_DECLARATION = re.compile(r"""^content\s*:\s*("[^"]*"|'[^']*');?$""")
+NAME_TOKEN = re.compile(r"[\w-]+")
+
+
+def minify_css(css):
+    """Drop comments and the whitespace that carries no meaning."""
+    strings = []
+
+    def protect(match):
+        if match.group(1) is None:
+            return ""
+        strings.append(match.group(1))
+        return f"\0{len(strings) - 1}\0"
+
+    css = CSS_COMMENT_OR_STRING.sub(protect, css)
+    css = re.sub(r"\s+", " ", css)
+    # Not around ":", which separates a descendant from a pseudo-class
+    css = re.sub(r" ?([{};,>]) ?", r"\1", css)
+    css = css.replace(";}", "}").strip()
+    return re.sub(r"\0(\d+)\0", lambda m: strings[int(m.group(1))], css)
+
+
+def minify_js(js):
+    """
+    Drop indentation, blank lines and whole-line ``//`` comments. Scripts
+    that may have multi-line template literals are left as they are.
+    """
+    lines = js.splitlines()
+    if any(line.count("`") % 2 for line in lines):
+        return js
+    lines = (line.strip() for line in lines)
+    return "\n".join(line for line in lines if line and not line.startswith("//"))
+
+
+def rebase_css_urls(css, source, bundle):
+    """Make relative ``url()``s of ``source`` relative to ``bundle``."""
+
+    def rebase(match):
+        url = match.group(2).strip()
+        if url.startswith(("data:", "#", "/")) or "://" in url:
+            return match.group(0)
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(source), url))
+        return f'url("{posixpath.relpath(target, posixpath.dirname(bundle))}")'
+
+    return CSS_URL.sub(rebase, css)
+
+
+def split_rules(css):
+    """Split minified CSS into its top-level ``selector{body}`` rules."""
+    rules = []
+    depth = start = 0
+    quote = None
+    for i, char in enumerate(css):
+        if quote:
+            if char == quote and css[i - 1] != "\\":
+                quote = None
+        elif char in "\"'":
+            quote = char
+        elif char == "{":
+            depth += 1
+        elif char == "}":
+            depth -= 1
+            if depth == 0:
+                rules.append(css[start : i + 1])
+                start = i + 1
+        elif char == ";" and depth == 0:
+            # A statement such as @import or @charset
+            rules.append(css[start : i + 1])
+            start = i + 1
+    if css[start:].strip():
+        rules.append(css[start:])
+    return rules
+
+
+def strip_unused_icons(css, used_names):
+    """Remove icon rules of classes that are not in ``used_names``."""
+    kept = []
+    for rule in split_rules(css):
+        selectors, _, body = rule.partition("{")
+        if selectors.startswith("@media"):
+            inner = strip_unused_icons(body[:-1], used_names)
+            if inner:
+                kept.append(f"{selectors}{{{inner}}}")
+            continue
+        matches = [ICON_SELECTOR.match(s.strip()) for s in selectors.split(",")]
+        if (
+            all(matches)
+            and ICON_DECLARATION.match(body[:-1].strip())
+            and not any(match.group(1) in used_names for match in matches)
+        ):
+            continue
+        kept.append(rule)
+    return "".join(kept)
+
+
+def template_names_in_use():
+    """Every class-like word in the project's templates."""
+    names = set()
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for path in Path(directory).rglob("*.html"):
+                names.update(NAME_TOKEN.findall(path.read_text(errors="ignore")))
+    return names
+
+
+def read(storage, name):
+    with storage.open(name) as f:
+        return f.read().decode("utf-8")
+
+
+def build_bundles(storage, bundles):
+    """The content of each bundle, built from the files in ``storage``."""
+    built = {}
+    used_names = None
+    for name, sources in bundles.items():
+        if name.endswith(".js"):
+            built[name] = ";\n".join(
+                minify_js(read(storage, source)) for source in sources
+            )
+            continue
+
+        if used_names is None:
+            used_names = template_names_in_use()
+            for scripts in bundles:
+                if scripts.endswith(".js"):
+                    for source in bundles[scripts]:
+                        used_names.update(NAME_TOKEN.findall(read(storage, source)))
+        built[name] = "".join(
+            strip_unused_icons(
+                minify_css(rebase_css_urls(read(storage, source), source, name)),
+                used_names,
+            )
+            for source in sources
+        )
+    return built
+
+
+class BundledStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Builds ``STATIC_BUNDLES`` before the files are hashed and compressed."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            for name, content in build_bundles(self, settings.STATIC_BUNDLES).items():
+                if self.exists(name):
+                    self.delete(name)
+                self._save(name, ContentFile(content.encode("utf-8")))
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+
+
+def bundle_files(name):
+    """The static files a page should include for bundle ``name``."""
+    if isinstance(staticfiles_storage, BundledStaticFilesStorage):
+        return [name]
+    return settings.STATIC_BUNDLES[name]
@@ -0,0 +1,80 @@
+"""
+The PostgreSQL backend with connections taken from a ``ConnectionPool``.
+
+Use it as the ``ENGINE`` with ``CONN_MAX_AGE = 0`` and size the pool with the
+``POOL`` entry of the database settings. Each thread still has its own
+connection while it handles a request; at the end of the request it goes
+back to the pool instead of being closed.
+"""
+
+import psycopg2
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+from django.utils.asyncio import async_unsafe
+from psycopg2 import extensions
+
+from ...pool import ConnectionPool, get_pool
+
+
+class PsycopgPool(ConnectionPool):
+    def is_broken(self, connection):
+        return connection.closed != 0
+
+    def reset(self, connection):
+        if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+
+    def ping(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            return True
+        except psycopg2.Error:
+            return False
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, alias=DEFAULT_DB_ALIAS):
+        super().__init__(settings_dict, alias)
+        if settings_dict.get("CONN_MAX_AGE"):
+            raise ImproperlyConfigured(
+                "The pooled PostgreSQL backend needs CONN_MAX_AGE = 0; the pool "
+                "keeps the connections open."
+            )
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get("POOL", {})
+        return get_pool(
+            self.alias,
+            lambda: PsycopgPool(
+                alias=self.alias,
+                min_size=options.get("MIN_SIZE", 0),
+                max_size=options.get("MAX_SIZE", 10),
+                timeout=options.get("TIMEOUT", 5),
+                check_interval=options.get("CHECK_INTERVAL", 30),
+                max_idle=options.get("MAX_IDLE", 600),
+                max_lifetime=options.get("MAX_LIFETIME", 3600),
+            ),
+        )
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        connection, is_new = self.pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        if not is_new:
+            # What get_new_connection() sets up for every new connection
+            self.isolation_level = IsolationLevel(
+                self.settings_dict["OPTIONS"].get(
+                    "isolation_level", IsolationLevel.READ_COMMITTED
+                )
+            )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -0,0 +1,224 @@
+"""
+A process-wide pool of database connections.
+
+Django opens a connection per thread (and under ASGI, per request) and
+closes it again unless ``CONN_MAX_AGE`` keeps it, so without a pool every
+request can pay for a new connection. The pooled backend hands Django's
+per-thread wrappers connections from here and takes them back when Django
+closes them.
+
+The pool does not know about any driver: subclasses say how to check,
+reset and close a connection.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+from .. import metrics
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Keeps between ``min_size`` and ``max_size`` connections. Callers wait up
+    to ``timeout`` seconds for a free connection when all are in use.
+
+    Connections idle for longer than ``check_interval`` are pinged before
+    they are handed out, connections older than ``max_lifetime`` are
+    replaced, and idle connections above ``min_size`` are closed after
+    ``max_idle`` seconds.
+    """
+
+    def __init__(
+        self,
+        alias="default",
+        min_size=0,
+        max_size=10,
+        timeout=5,
+        check_interval=30,
+        max_idle=600,
+        max_lifetime=3600,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Expected 0 <= min_size <= max_size and max_size >= 1.")
+        self.alias = alias
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.condition = threading.Condition()
+        self.reset_state()
+
+    def reset_state(self):
+        self.pid = os.getpid()
+        # (connection, opened at, idle since); the most recently used last
+        self.idle = deque()
+        self.opened_at = {}
+        self.size = 0
+        self.filled = False
+
+    # Driver specific
+
+    def is_broken(self, connection):
+        return False
+
+    def reset(self, connection):
+        """Prepare a returned connection for reuse, e.g. roll back."""
+
+    def ping(self, connection):
+        return True
+
+    def close(self, connection):
+        connection.close()
+
+    # Pooling
+
+    @property
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def stats(self):
+        with self.condition:
+            return {"size": self.size, "idle": len(self.idle), "in_use": self.in_use}
+
+    def acquire(self, connect, timeout=None):
+        """
+        A connection from the pool, or a new one from ``connect()`` while
+        the pool is below ``max_size``. Returns ``(connection, is_new)``.
+        """
+        started = time.monotonic()
+        deadline = started + (self.timeout if timeout is None else timeout)
+        if not self.filled:
+            self.fill(connect)
+
+        while True:
+            connection, opened_at, idle_since = self.checkout(deadline)
+            if connection is None:
+                connection = self.open(connect)
+                metrics.db_pool_wait.observe(time.monotonic() - started, self.alias)
+                return connection, True
+
+            now = time.monotonic()
+            if self.is_broken(connection):
+                self.discard(connection, "broken")
+            elif now - opened_at > self.max_lifetime:
+                self.discard(connection, "expired")
+            elif now - idle_since > self.check_interval and not self.ping(connection):
+                self.discard(connection, "failed_check")
+            else:
+                metrics.db_pool_wait.observe(now - started, self.alias)
+                return connection, False
+
+    def checkout(self, deadline):
+        """
+        Take an idle connection, or reserve a slot for a new one (returning
+        ``None``), waiting until ``deadline`` when the pool is exhausted.
+        """
+        with self.condition:
+            if self.pid != os.getpid():
+                # Connections inherited from the parent process belong to it
+                self.reset_state()
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None, None, None
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.db_pool_timeouts.inc(self.alias)
+                    raise PoolTimeout(
+                        f"No connection to {self.alias!r} became free within the "
+                        f"pool timeout ({self.max_size} connections in use)."
+                    )
+                self.condition.wait(remaining)
+
+    def open(self, connect):
+        # The slot was reserved by checkout(); give it back on failure
+        try:
+            connection = connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+        with self.condition:
+            self.opened_at[id(connection)] = time.monotonic()
+        metrics.db_pool_opened.inc(self.alias)
+        return connection
+
+    def fill(self, connect):
+        """Open connections until there are ``min_size`` of them."""
+        self.filled = True
+        while True:
+            with self.condition:
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            connection = self.open(connect)
+            self.release(connection)
+
+    def release(self, connection):
+        """Give a connection back, or close it if it cannot be reused."""
+        if self.is_broken(connection):
+            self.discard(connection, "broken")
+            return
+        try:
+            self.reset(connection)
+        except Exception:
+            self.discard(connection, "broken")
+            return
+
+        now = time.monotonic()
+        expired = []
+        with self.condition:
+            opened_at = self.opened_at.get(id(connection))
+            if opened_at is None or self.pid != os.getpid():
+                # Not (or no longer) one of ours
+                return
+            self.idle.append((connection, opened_at, now))
+            # The least recently used connections are at the front
+            while (
+                self.size - len(expired) > self.min_size
+                and len(self.idle) > 1
+                and now - self.idle[0][2] > self.max_idle
+            ):
+                expired.append(self.idle.popleft()[0])
+            self.condition.notify()
+        for connection in expired:
+            self.discard(connection, "idle")
+
+    def discard(self, connection, reason):
+        with self.condition:
+            if self.opened_at.pop(id(connection), None) is not None:
+                self.size -= 1
+                self.condition.notify()
+        metrics.db_pool_closed.inc(self.alias, reason)
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory):
+    """The process-wide pool of ``alias``, created by ``factory()`` once."""
+    pool = pools.get(alias)
+    if pool is None:
+        with pools_lock:
+            pool = pools.get(alias)
+            if pool is None:
+                pool = pools[alias] = factory()
+    return pool
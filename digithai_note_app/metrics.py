@@ -0,0 +1,340 @@
+"""
+A small Prometheus-compatible metrics registry.
+
+Measurements only update in-memory counters under a lock. Every process
+writes its values to its own file in ``METRICS_DIR`` at most every
+``METRICS_FLUSH_INTERVAL`` seconds, and ``/metrics`` adds up the files of
+all workers, so any gunicorn worker can answer a scrape for the whole
+server. Without ``METRICS_DIR`` only the answering process is reported.
+"""
+
+import atexit
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from core.cache import note_card_cache, note_list_cache
+from django.conf import settings
+
+# Upper bounds of the histogram buckets, in seconds and in queries
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+HASHING_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+def format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, documentation, labelnames=()):
+        self.lock = registry.lock
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def set(self, value, *labels):
+        # For mirroring a counter that is kept elsewhere
+        with self.lock:
+            self.values[labels] = value
+
+    def merge(self, values, other):
+        for labels, value in other.items():
+            values[labels] = values.get(labels, 0) + value
+
+    def render(self, values):
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}"
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, registry, name, documentation, labelnames=(), buckets=()):
+        self.lock = registry.lock
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: the count of each bucket (not cumulative), then the
+        # count above the last bucket, then the sum of all observations
+        self.values = {}
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def merge(self, values, other):
+        for labels, counts in other.items():
+            if len(counts) != len(self.buckets) + 2:
+                # Written with different buckets by an older deployment
+                continue
+            current = values.setdefault(labels, [0] * len(counts))
+            for i, count in enumerate(counts):
+                current[i] += count
+
+    def render(self, values):
+        bounds = [*map(format_value, self.buckets), "+Inf"]
+        for labels, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                label_text = format_labels(self.labelnames, labels, [("le", bound)])
+                yield f"{self.name}_bucket{label_text} {cumulative}"
+            label_text = format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {format_value(counts[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = []
+        self.next_flush = 0.0
+        self.pid = None
+        self.path = None
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=()):
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """Register a callable that updates metrics right before a snapshot."""
+        self.collectors.append(collector)
+        return collector
+
+    def snapshot(self):
+        for collector in self.collectors:
+            collector()
+        with self.lock:
+            return {
+                name: {
+                    labels: list(value) if isinstance(value, list) else value
+                    for labels, value in metric.values.items()
+                }
+                for name, metric in self.metrics.items()
+            }
+
+    def reset(self):
+        with self.lock:
+            for metric in self.metrics.values():
+                metric.values.clear()
+
+    # Sharing between processes
+
+    def worker_path(self, directory):
+        pid = os.getpid()
+        if pid != self.pid:
+            # A fresh name per process, so a recycled pid never overwrites
+            # (and loses) the totals of an earlier worker
+            self.pid = pid
+            self.path = Path(directory, f"worker-{pid}-{time.time_ns()}.json")
+        return self.path
+
+    def maybe_flush(self):
+        if time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def flush(self):
+        self.next_flush = time.monotonic() + settings.METRICS_FLUSH_INTERVAL
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        path = self.worker_path(directory)
+        data = {
+            name: [[list(labels), value] for labels, value in values.items()]
+            for name, values in self.snapshot().items()
+        }
+        # Written to a temporary file and renamed, so readers never see a
+        # half-written file
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".worker-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def read_workers(self, directory, exclude=None):
+        for path in Path(directory).glob("worker-*.json"):
+            if path == exclude:
+                continue
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                # The worker file was removed while the directory was listed
+                continue
+            yield {
+                name: {tuple(labels): value for labels, value in values}
+                for name, values in data.items()
+            }
+
+    def collect(self):
+        """The values of all workers, summed, keyed by metric name."""
+        values = {name: {} for name in self.metrics}
+        snapshots = [self.snapshot()]
+        directory = settings.METRICS_DIR
+        if directory:
+            self.flush()
+            snapshots.extend(self.read_workers(directory, exclude=self.path))
+
+        for snapshot in snapshots:
+            for name, metric_values in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is not None:
+                    metric.merge(values[name], metric_values)
+        return values
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, values in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            lines.extend(metric.render(values))
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total",
+    "Requests handled, by URL name, method and status code.",
+    ("route", "method", "status"),
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "Time taken to answer a request, by URL name.",
+    ("route",),
+    LATENCY_BUCKETS,
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "Database queries made by a request, by URL name.",
+    ("route",),
+    QUERY_BUCKETS,
+)
+http_request_db_duration = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent in database queries, by URL name.",
+    ("route",),
+    LATENCY_BUCKETS,
+)
+note_list_cache_requests = registry.counter(
+    "notes_list_cache_requests_total",
+    "Note list cache lookups, by result.",
+    ("result",),
+)
+note_card_cache_requests = registry.counter(
+    "notes_card_cache_requests_total",
+    "Note card cache lookups, by result.",
+    ("result",),
+)
+
+db_pool_wait = registry.histogram(
+    "db_pool_wait_seconds",
+    "Time spent getting a connection from the pool, including opening it.",
+    ("alias",),
+    POOL_WAIT_BUCKETS,
+)
+db_pool_timeouts = registry.counter(
+    "db_pool_timeouts_total",
+    "Connection requests that timed out because the pool was exhausted.",
+    ("alias",),
+)
+db_pool_opened = registry.counter(
+    "db_pool_connections_opened_total",
+    "Connections opened by the pool.",
+    ("alias",),
+)
+db_pool_closed = registry.counter(
+    "db_pool_connections_closed_total",
+    "Connections closed by the pool, by reason.",
+    ("alias", "reason"),
+)
+
+auth_hashing_jobs = registry.counter(
+    "auth_hashing_jobs_total",
+    "Password hashing jobs, by outcome (completed, rejected, timed_out).",
+    ("outcome",),
+)
+auth_hashing_queue_depth = registry.histogram(
+    "auth_hashing_queue_depth",
+    "Hashing jobs already running or queued when a job was submitted.",
+    (),
+    QUEUE_DEPTH_BUCKETS,
+)
+auth_hashing_wait = registry.histogram(
+    "auth_hashing_wait_seconds",
+    "Time a hashing job waited for a free worker.",
+    (),
+    HASHING_BUCKETS,
+)
+auth_hashing_duration = registry.histogram(
+    "auth_hashing_duration_seconds",
+    "Time taken to hash or check a password.",
+    (),
+    HASHING_BUCKETS,
+)
+
+
+def observe_request(route, method, status, duration, queries, db_time):
+    route = route or UNMATCHED_ROUTE
+    http_requests.inc(route, method, str(status))
+    http_request_duration.observe(duration, route)
+    http_request_db_queries.observe(queries, route)
+    http_request_db_duration.observe(db_time, route)
+    registry.maybe_flush()
+
+
+@registry.add_collector
+def collect_note_cache_stats():
+    stats = note_list_cache.stats.as_dict()
+    note_list_cache_requests.set(stats["hits"], "hit")
+    note_list_cache_requests.set(stats["misses"], "miss")
+    stats = note_card_cache.stats.as_dict()
+    note_card_cache_requests.set(stats["hits"], "hit")
+    note_card_cache_requests.set(stats["misses"], "miss")
+
+
+@atexit.register
+def flush_at_exit():
+    # Keep the last measurements of a worker that is shutting down
+    if settings.configured and registry.pid == os.getpid():
+        registry.flush()
@@ -0,0 +1,168 @@
+import json
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+from . import metrics
+from .timing import (
+    RequestTimings,
+    current_timings,
+    install_query_recorder,
+    install_query_recorders,
+)
+
+logger = logging.getLogger("digithai_note_app.requests")
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """
+    WhiteNoise, usable in an async middleware chain. WhiteNoise itself is
+    sync only, which would make Django run every request under ASGI in a
+    worker thread, including those for async views.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
+
+
+class RequestTimingMiddleware:
+    """
+    Measures each request's database queries and time, template rendering
+    time, view time and total time.
+
+    With ``REQUEST_TIMING`` they are sent back in a ``Server-Timing`` header
+    and logged as one JSON line; requests slower than
+    ``REQUEST_TIMING_SLOW_MS`` are logged as warnings with their SQL. With
+    ``METRICS_ENABLED`` they are added to the histograms served at
+    ``/metrics``.
+
+    View time runs from ``process_view`` until the response is rendered, so
+    it includes the database and template time. Template time needs the
+    ``digithai_note_app.timing.DjangoTemplates`` backend.
+
+    With both switched off, the middleware removes itself from the chain at
+    startup and costs nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.report = settings.REQUEST_TIMING
+        self.record_metrics = settings.METRICS_ENABLED
+        if not (self.report or self.record_metrics):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.slow_threshold = settings.REQUEST_TIMING_SLOW_MS / 1000
+        connection_created.connect(
+            install_query_recorder, dispatch_uid="request_timing_queries"
+        )
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timings = self.start()
+        token = current_timings.set(timings)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings = self.start()
+        token = current_timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def start(self):
+        # Connections opened before the middleware was loaded are not
+        # announced by connection_created
+        install_query_recorders()
+        return RequestTimings()
+
+    def finish(self, request, response, timings):
+        total = timings.total_time
+        if timings.view_started is not None:
+            timings.view_time = time.perf_counter() - timings.view_started
+
+        match = request.resolver_match
+        route = match.view_name if match else None
+        if self.record_metrics:
+            metrics.observe_request(
+                route,
+                request.method,
+                response.status_code,
+                total,
+                timings.queries,
+                timings.db_time,
+            )
+        if self.report:
+            self.report_timings(request, response, route, timings, total)
+        return response
+
+    def report_timings(self, request, response, route, timings, total):
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={timings.db_time * 1000:.2f};desc="{timings.queries} queries"',
+                f"tpl;dur={timings.template_time * 1000:.2f}",
+                f"view;dur={timings.view_time * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "route": route,
+            "status": response.status_code,
+            "queries": timings.queries,
+            "db_ms": round(timings.db_time * 1000, 2),
+            "template_ms": round(timings.template_time * 1000, 2),
+            "view_ms": round(timings.view_time * 1000, 2),
+            "total_ms": round(total * 1000, 2),
+        }
+        if total < self.slow_threshold:
+            logger.info(json.dumps(record))
+        else:
+            # Only the statements are logged; parameters may hold note content
+            record["sql"] = [
+                {"ms": round(duration * 1000, 2), "sql": sql}
+                for sql, duration in timings.statements
+            ]
+            logger.warning(json.dumps(record))
@@ -0,0 +1,98 @@
+"""
+Routes safe note reads to the read replica (``DATABASES["replica"]``).
+
+Nothing is read from the replica unless a view opts in with
+``replica_reads()``, and only for the apps in ``REPLICA_APPS``: sessions,
+users and tokens always come from the primary. Users whose notes changed in
+the last ``REPLICA_PIN_SECONDS`` are kept on the primary, so they always see
+their own writes even while the replica lags behind. The pins live in the
+default cache, so the replica is only used when ``REPLICA_READS`` says that
+cache is shared by all workers.
+"""
+
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+REPLICA_DB_ALIAS = "replica"
+
+# Apps whose models may be read from the replica
+REPLICA_APPS = {"core"}
+
+use_replica = ContextVar("use_replica", default=False)
+
+
+def replica_configured():
+    # Pins only work when every worker sees them (see REPLICA_READS)
+    return REPLICA_DB_ALIAS in settings.DATABASES and settings.REPLICA_READS
+
+
+def pin_key(user_id):
+    return f"db:pinned:{user_id}"
+
+
+def pin_to_primary(user_ids):
+    """Read the notes of ``user_ids`` from the primary for a while."""
+    if replica_configured():
+        cache.set_many(
+            {pin_key(user_id): True for user_id in user_ids},
+            settings.REPLICA_PIN_SECONDS,
+        )
+
+
+def is_pinned(user_id):
+    return cache.get(pin_key(user_id)) is not None
+
+
+async def ais_pinned(user_id):
+    return await cache.aget(pin_key(user_id)) is not None
+
+
+@contextmanager
+def reading_from_replica():
+    token = use_replica.set(True)
+    try:
+        yield
+    finally:
+        use_replica.reset(token)
+
+
+@contextmanager
+def replica_reads(user_id):
+    """Let reads made inside the block go to the replica, unless pinned."""
+    if not replica_configured() or is_pinned(user_id):
+        yield
+        return
+    with reading_from_replica():
+        yield
+
+
+@asynccontextmanager
+async def areplica_reads(user_id):
+    """``replica_reads()`` for async views; the pin is read asynchronously."""
+    if not replica_configured() or await ais_pinned(user_id):
+        yield
+        return
+    with reading_from_replica():
+        yield
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if use_replica.get() and model._meta.app_label in REPLICA_APPS:
+            return REPLICA_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication
+        return db != REPLICA_DB_ALIAS
@@ -50,12 +50,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "digithai_note_app.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "digithai_note_app.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "users.middleware.HashingSaturationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -67,7 +69,8 @@ ROOT_URLCONF = "digithai_note_app.urls"
 
 TEMPLATES = [
     {
-        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        # The Django backend, with render times for RequestTimingMiddleware
+        "BACKEND": "digithai_note_app.timing.DjangoTemplates",
         "DIRS": [],
         "APP_DIRS": True,
         "OPTIONS": {
@@ -81,27 +84,114 @@ TEMPLATES = [
     },
 ]
 
+# Report per-request query counts and timings in a Server-Timing header and
+# the "digithai_note_app.requests" log; slower requests are logged with SQL
+REQUEST_TIMING = config("REQUEST_TIMING", default=False, cast=bool)
+REQUEST_TIMING_SLOW_MS = config("REQUEST_TIMING_SLOW_MS", default=500, cast=int)
+
+# Serve request counts and latency/query histograms per URL name at /metrics,
+# in the Prometheus text format. With several worker processes, point
+# METRICS_DIR at a directory they share (emptied on deploy); each worker
+# writes its values there every METRICS_FLUSH_INTERVAL seconds. Set
+# METRICS_TOKEN to require "Authorization: Bearer <token>" from scrapers.
+METRICS_ENABLED = config("METRICS_ENABLED", default=False, cast=bool)
+METRICS_DIR = config("METRICS_DIR", default="")
+METRICS_FLUSH_INTERVAL = config("METRICS_FLUSH_INTERVAL", default=5, cast=float)
+METRICS_TOKEN = config("METRICS_TOKEN", default="")
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "digithai_note_app.requests": {
+            "handlers": ["console"],
+            "level": config("REQUEST_LOG_LEVEL", default="INFO"),
+            "propagate": False,
+        },
+    },
+}
+
+# Stateless JWT authentication trusts the token's user id and only checks
+# the cached account status instead of loading the user on every request
+API_STATELESS_AUTH = config("API_STATELESS_AUTH", default=True, cast=bool)
+
+# Seconds a user's active status is cached for stateless authentication
+USER_STATUS_CACHE_TIMEOUT = config("USER_STATUS_CACHE_TIMEOUT", default=60, cast=int)
+
+# Token-bucket rate limits of the API, see api.throttling: "<requests>/<period>"
+# with a period of second, minute, hour or day. Login and registration are
+# limited per IP address, note writes per user on top of the "user" rate.
+API_THROTTLING = config("API_THROTTLING", default=True, cast=bool)
+API_THROTTLE_RATES = {
+    "user": config("API_THROTTLE_USER", default="100/hour"),
+    "anon": config("API_THROTTLE_ANON", default="10/hour"),
+    "login": config("API_THROTTLE_LOGIN", default="10/minute"),
+    "refresh": config("API_THROTTLE_REFRESH", default="60/minute"),
+    "register": config("API_THROTTLE_REGISTER", default="5/hour"),
+    "note_write": config("API_THROTTLE_NOTE_WRITE", default="30/minute"),
+}
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        (
+            "api.authentication.CachedStatusJWTAuthentication"
+            if API_STATELESS_AUTH
+            else "rest_framework_simplejwt.authentication.JWTAuthentication"
+        ),
     ),
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
-    "DEFAULT_THROTTLE_RATES": {
-        "user": "100/hour",
-        "anon": "10/hour",
-    },
+    "DEFAULT_THROTTLE_CLASSES": (
+        "api.throttling.AnonTokenBucketThrottle",
+        "api.throttling.UserTokenBucketThrottle",
+    ),
+    # Without a rate a throttle lets every request through
+    "DEFAULT_THROTTLE_RATES": (
+        API_THROTTLE_RATES if API_THROTTLING else dict.fromkeys(API_THROTTLE_RATES)
+    ),
 }
 
 
+# Use the async notes pages (core.async_views); asgi.py turns this on
+NOTES_ASYNC_VIEWS = config("NOTES_ASYNC_VIEWS", default=False, cast=bool)
+
+# Largest number of notes accepted by a single bulk API request
+NOTES_BULK_MAX_ITEMS = config("NOTES_BULK_MAX_ITEMS", default=500, cast=int)
+
+# Rows fetched per database round trip while streaming a notes export
+NOTES_EXPORT_CHUNK_SIZE = config("NOTES_EXPORT_CHUNK_SIZE", default=2000, cast=int)
+
+# Notes inserted per transaction by the import endpoint and command
+NOTES_IMPORT_BATCH_SIZE = config("NOTES_IMPORT_BATCH_SIZE", default=500, cast=int)
+
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=5),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    "TOKEN_USER_CLASS": "api.authentication.AccountTokenUser",
+    "TOKEN_REFRESH_SERIALIZER": "api.serializers.TokenRefreshSerializer",
 }
 
+# How often, in seconds, each process picks up tokens blacklisted by other
+# processes, and rebuilds its blacklist filter from scratch (see api.blacklist)
+TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL = config(
+    "TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL", default=10, cast=float
+)
+TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL = config(
+    "TOKEN_BLACKLIST_FILTER_REBUILD_INTERVAL", default=3600, cast=float
+)
+
+# Rows deleted per statement, and seconds slept between statements, when
+# purging expired tokens and sessions (manage.py purge_expired)
+PURGE_BATCH_SIZE = config("PURGE_BATCH_SIZE", default=500, cast=int)
+PURGE_BATCH_PAUSE = config("PURGE_BATCH_PAUSE", default=0.1, cast=float)
+
 WSGI_APPLICATION = "digithai_note_app.wsgi.application"
 
 
@@ -117,9 +207,137 @@ DATABASES = {
         "HOST": config("POSTGRES_HOST"),
         "PORT": config("POSTGRES_PORT"),
         "CONN_MAX_AGE": int(config("POSTGRES_CONN_MAX_AGE")),
+        # Used by DB_ENGINE=digithai_note_app.db.backends.postgresql_pool,
+        # which needs POSTGRES_CONN_MAX_AGE=0. Sizes are per process.
+        "POOL": {
+            "MIN_SIZE": config("DB_POOL_MIN_SIZE", default=2, cast=int),
+            "MAX_SIZE": config("DB_POOL_MAX_SIZE", default=10, cast=int),
+            # Seconds to wait for a free connection before failing
+            "TIMEOUT": config("DB_POOL_TIMEOUT", default=5, cast=float),
+            # Connections idle for longer are checked before reuse
+            "CHECK_INTERVAL": config("DB_POOL_CHECK_INTERVAL", default=30, cast=float),
+            "MAX_IDLE": config("DB_POOL_MAX_IDLE", default=600, cast=float),
+            "MAX_LIFETIME": config("DB_POOL_MAX_LIFETIME", default=3600, cast=float),
+        },
     }
 }
 
+# Optional read replica for note lists, searches and details (see
+# digithai_note_app.routers). Set REPLICA_DB_HOST for a Postgres replica, or
+# REPLICA_DB_NAME for another database (e.g. a copy of the SQLite file)
+REPLICA_DB_HOST = config("REPLICA_DB_HOST", default="")
+REPLICA_DB_NAME = config("REPLICA_DB_NAME", default="")
+if REPLICA_DB_HOST or REPLICA_DB_NAME:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": REPLICA_DB_HOST or DATABASES["default"]["HOST"],
+        "NAME": REPLICA_DB_NAME or DATABASES["default"]["NAME"],
+        # Tests run against the primary only
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["digithai_note_app.routers.ReplicaRouter"]
+
+# Seconds a user's note reads stay on the primary after they changed a note,
+# so they see their own writes despite replication lag. Pins are kept in the
+# default cache, which must be shared by all workers (see REPLICA_READS).
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=float)
+
+# Note bodies of at least this many bytes are stored compressed, with brotli
+# (falling back to zlib when the package is missing) or zlib
+NOTES_COMPRESSION = config("NOTES_COMPRESSION", default="brotli")
+NOTES_COMPRESSION_MIN_SIZE = config(
+    "NOTES_COMPRESSION_MIN_SIZE", default=1024, cast=int
+)
+
+# Text search configuration used for the notes full-text index on PostgreSQL
+NOTES_SEARCH_CONFIG = config("NOTES_SEARCH_CONFIG", default="english")
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The "notes" cache holds note list pages and rendered note cards. It defaults
+# to local memory so it works without Redis; use the file based backend to
+# share it between the workers of one machine, e.g.
+# NOTES_CACHE_BACKEND=django.core.cache.backends.filebased.FileBasedCache
+# NOTES_CACHE_LOCATION=/var/tmp/digithai_notes_cache
+LOCMEM_CACHE = "django.core.cache.backends.locmem.LocMemCache"
+CACHE_BACKEND = config("CACHE_BACKEND", default=LOCMEM_CACHE)
+NOTES_CACHE_BACKEND = config("NOTES_CACHE_BACKEND", default=LOCMEM_CACHE)
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKEND,
+        "LOCATION": config("CACHE_LOCATION", default="default"),
+    },
+    "notes": {
+        "BACKEND": NOTES_CACHE_BACKEND,
+        "LOCATION": config("NOTES_CACHE_LOCATION", default="notes"),
+    },
+}
+
+# Cached note list pages are invalidated by a per-user version kept in the
+# "notes" cache, so every worker must see the same cache: with a per-process
+# one, other workers would keep serving pages from before a write. Pages are
+# therefore only cached when the "notes" cache is not local memory.
+NOTES_LIST_CACHE = config(
+    "NOTES_LIST_CACHE", default=NOTES_CACHE_BACKEND != LOCMEM_CACHE, cast=bool
+)
+# The replica's read-your-writes pins (see REPLICA_PIN_SECONDS) live in the
+# default cache, so for the same reason reads only go to a configured replica
+# when that cache is not local memory
+REPLICA_READS = config(
+    "REPLICA_READS", default=CACHE_BACKEND != LOCMEM_CACHE, cast=bool
+)
+# Seconds a cached note list page is kept; writes invalidate pages immediately
+NOTES_LIST_CACHE_TIMEOUT = config("NOTES_LIST_CACHE_TIMEOUT", default=300, cast=int)
+# Seconds a rendered note card is kept; edited notes get new cards right away
+NOTE_CARD_CACHE_TIMEOUT = config("NOTE_CARD_CACHE_TIMEOUT", default=86400, cast=int)
+
+# "users.sessions" serves sessions from SESSION_CACHE_ALIAS (which must be
+# shared by all workers) and writes them to the database in the background,
+# every SESSION_WRITE_DELAY seconds (0 writes them during the request)
+SESSION_ENGINE = config("SESSION_ENGINE", default="django.contrib.sessions.backends.db")
+SESSION_CACHE_ALIAS = config("SESSION_CACHE_ALIAS", default="default")
+SESSION_WRITE_DELAY = config("SESSION_WRITE_DELAY", default=2, cast=float)
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/4.2/topics/auth/passwords/
+
+# "pbkdf2" or "argon2" (needs argon2-cffi). Use manage.py bench_hashing to
+# pick the cost; existing hashes are upgraded when their users next log in.
+PASSWORD_HASHER_PROFILE = config("PASSWORD_HASHER_PROFILE", default="pbkdf2")
+PASSWORD_HASHER_PROFILES = {
+    "pbkdf2": "users.hashers.PBKDF2PasswordHasher",
+    "argon2": "users.hashers.Argon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE],
+    *(
+        hasher
+        for profile, hasher in PASSWORD_HASHER_PROFILES.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ),
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+# 0 keeps Django's default number of iterations
+PBKDF2_ITERATIONS = config("PBKDF2_ITERATIONS", default=0, cast=int)
+ARGON2_TIME_COST = config("ARGON2_TIME_COST", default=2, cast=int)
+# In KiB
+ARGON2_MEMORY_COST = config("ARGON2_MEMORY_COST", default=102400, cast=int)
+ARGON2_PARALLELISM = config("ARGON2_PARALLELISM", default=8, cast=int)
+
+# Passwords are hashed by HASHING_WORKERS threads per process (0 hashes on
+# the request thread). Up to HASHING_QUEUE_SIZE more logins and signups wait,
+# for at most HASHING_TIMEOUT seconds; any others get a 503 straight away.
+HASHING_WORKERS = config("HASHING_WORKERS", default=2, cast=int)
+HASHING_QUEUE_SIZE = config("HASHING_QUEUE_SIZE", default=8, cast=int)
+HASHING_TIMEOUT = config("HASHING_TIMEOUT", default=5, cast=float)
+# Seconds clients are asked to wait before retrying
+HASHING_RETRY_AFTER = config("HASHING_RETRY_AFTER", default=1, cast=int)
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -161,8 +379,24 @@ STATICFILES_DIRS = (os.path.join(BASE_DIR, "static"),)
 
 STATIC_ROOT = os.path.join(BASE_DIR, "staticfiles")
 # Enable the WhiteNoise storage backend, which compresses static files to reduce disk use
-# and renames the files with unique names for each version to support long-term caching
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# and renames the files with unique names for each version to support long-term caching.
+# It also builds STATIC_BUNDLES, see digithai_note_app.bundling
+STATICFILES_STORAGE = "digithai_note_app.bundling.BundledStaticFilesStorage"
+
+# Bundles built by collectstatic, included in templates with {% bundle %}
+STATIC_BUNDLES = {
+    "bundles/app.css": [
+        "assets/css/backend.css",
+        "assets/vendor/fortawesome/fontawesome-free/css/all.min.css",
+        "assets/vendor/line-awesome/dist/line-awesome/css/line-awesome.min.css",
+        "assets/vendor/remixicon/fonts/remixicon.css",
+        "assets/vendor/icon/dripicons/dripicons.css",
+    ],
+    "bundles/app.js": [
+        "assets/js/backend-bundle.min.js",
+        "assets/js/app.js",
+    ],
+}
 
 
 # Default primary key field type
@@ -0,0 +1,373 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+from core.models import Note
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import AccountUser
+
+from .bundling import (
+    minify_css,
+    minify_js,
+    rebase_css_urls,
+    strip_unused_icons,
+)
+from .db.pool import ConnectionPool, PoolTimeout
+from .metrics import MetricsRegistry, db_pool_timeouts, registry
+from .routers import REPLICA_DB_ALIAS, replica_configured, replica_reads
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.healthy = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool(ConnectionPool):
+    def is_broken(self, connection):
+        return connection.closed
+
+    def ping(self, connection):
+        return connection.healthy
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+
+    def connect(self):
+        connection = FakeConnection(len(self.opened))
+        self.opened.append(connection)
+        return connection
+
+    def test_connections_are_reused(self):
+        pool = FakePool(max_size=2)
+        first, is_new = pool.acquire(self.connect)
+        self.assertTrue(is_new)
+        pool.release(first)
+
+        again, is_new = pool.acquire(self.connect)
+        self.assertIs(again, first)
+        self.assertFalse(is_new)
+        self.assertEqual(pool.stats(), {"size": 1, "idle": 0, "in_use": 1})
+
+    def test_min_size_is_opened_up_front(self):
+        pool = FakePool(min_size=3, max_size=5)
+        pool.acquire(self.connect)
+        self.assertEqual(len(self.opened), 3)
+        self.assertEqual(pool.stats(), {"size": 3, "idle": 2, "in_use": 1})
+
+    def test_exhausted_pool_times_out(self):
+        pool = FakePool(alias="test", max_size=1)
+        pool.acquire(self.connect)
+        timeouts = db_pool_timeouts.values.get(("test",), 0)
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(self.connect, timeout=0.01)
+        self.assertEqual(db_pool_timeouts.values[("test",)], timeouts + 1)
+
+    def test_waiters_get_released_connections(self):
+        pool = FakePool(max_size=1)
+        connection, _ = pool.acquire(self.connect)
+        received = []
+        waiter = threading.Thread(
+            target=lambda: received.append(pool.acquire(self.connect, timeout=5))
+        )
+        waiter.start()
+        pool.release(connection)
+        waiter.join()
+        self.assertEqual(received, [(connection, False)])
+
+    def test_unusable_connections_are_replaced(self):
+        pool = FakePool(max_size=2, check_interval=0)
+        connection, _ = pool.acquire(self.connect)
+        pool.release(connection)
+        connection.healthy = False
+
+        replacement, is_new = pool.acquire(self.connect)
+        self.assertTrue(is_new)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()["size"], 1)
+
+        replacement.closed = True
+        pool.release(replacement)
+        self.assertEqual(pool.stats()["size"], 0)
+
+    def test_failed_connect_frees_its_slot(self):
+        pool = FakePool(max_size=1)
+        with self.assertRaises(OSError):
+            pool.acquire(mock.Mock(side_effect=OSError("refused")))
+        connection, _ = pool.acquire(self.connect, timeout=0)
+        self.assertEqual(connection.number, 0)
+
+
+class MetricsRegistryTests(TestCase):
+
+    def make_registry(self):
+        test_registry = MetricsRegistry()
+        requests = test_registry.counter("requests_total", "Requests.", ("route",))
+        latency = test_registry.histogram(
+            "latency_seconds", "Latency.", ("route",), (0.1, 1)
+        )
+        return test_registry, requests, latency
+
+    def test_render(self):
+        test_registry, requests, latency = self.make_registry()
+        requests.inc("home")
+        requests.inc("home")
+        for value in (0.05, 0.1, 0.5, 3):
+            latency.observe(value, "home")
+
+        lines = test_registry.render().splitlines()
+        self.assertIn("# TYPE requests_total counter", lines)
+        self.assertIn('requests_total{route="home"} 2', lines)
+        self.assertIn("# TYPE latency_seconds histogram", lines)
+        self.assertIn('latency_seconds_bucket{route="home",le="0.1"} 2', lines)
+        self.assertIn('latency_seconds_bucket{route="home",le="1"} 3', lines)
+        self.assertIn('latency_seconds_bucket{route="home",le="+Inf"} 4', lines)
+        self.assertIn('latency_seconds_sum{route="home"} 3.65', lines)
+        self.assertIn('latency_seconds_count{route="home"} 4', lines)
+
+    def test_label_values_are_escaped(self):
+        test_registry, requests, _ = self.make_registry()
+        requests.inc('a"b\\c')
+        self.assertIn(r'requests_total{route="a\"b\\c"} 1', test_registry.render())
+
+    def test_workers_are_aggregated(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        first, first_requests, first_latency = self.make_registry()
+        second, second_requests, second_latency = self.make_registry()
+
+        with override_settings(METRICS_DIR=directory.name):
+            first_requests.inc("home")
+            first_latency.observe(0.5, "home")
+            second_requests.inc("home", amount=2)
+            second_requests.inc("note-list")
+            second_latency.observe(0.01, "home")
+            second.flush()
+
+            lines = first.render().splitlines()
+
+        self.assertIn('requests_total{route="home"} 3', lines)
+        self.assertIn('requests_total{route="note-list"} 1', lines)
+        self.assertIn('latency_seconds_bucket{route="home",le="0.1"} 1', lines)
+        self.assertIn('latency_seconds_count{route="home"} 2', lines)
+
+
+@override_settings(
+    METRICS_ENABLED=True,
+    METRICS_DIR="",
+    METRICS_TOKEN="",
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class MetricsViewTests(TestCase):
+
+    def setUp(self):
+        registry.reset()
+        self.user = AccountUser.objects.create_user(
+            email_address="metrics@example.com", password="testpass"
+        )
+        self.client.force_login(self.user)
+
+    def test_requests_are_measured_per_route(self):
+        self.client.get(reverse("home"))
+        self.client.get(reverse("home"))
+        self.client.get("/no-such-page/")
+
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        lines = response.content.decode().splitlines()
+        self.assertIn(
+            'http_requests_total{route="home",method="GET",status="200"} 2', lines
+        )
+        self.assertIn(
+            'http_requests_total{route="unmatched",method="GET",status="404"} 1',
+            lines,
+        )
+        self.assertIn('http_request_duration_seconds_count{route="home"} 2', lines)
+        self.assertIn('http_request_db_queries_count{route="home"} 2', lines)
+        self.assertTrue(
+            any(line.startswith("notes_list_cache_requests_total") for line in lines)
+        )
+
+    @override_settings(METRICS_TOKEN="scrape-secret")
+    def test_token_is_required_when_configured(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 401)
+
+        response = self.client.get(
+            reverse("metrics"), HTTP_AUTHORIZATION="Bearer scrape-secret"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 404)
+
+
+class ReplicaSettingsTests(SimpleTestCase):
+
+    def test_replica_needs_a_shared_cache(self):
+        replica = {REPLICA_DB_ALIAS: settings.DATABASES["default"]}
+        with mock.patch.dict(settings.DATABASES, replica):
+            with override_settings(REPLICA_READS=False):
+                self.assertFalse(replica_configured())
+            with override_settings(REPLICA_READS=True):
+                self.assertTrue(replica_configured())
+        with override_settings(REPLICA_READS=True):
+            self.assertFalse(replica_configured())
+
+
+@mock.patch("digithai_note_app.routers.replica_configured", lambda: True)
+@override_settings(
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+)
+class ReplicaRouterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = AccountUser.objects.create_user(
+            email_address="reader@example.com", password="testpass"
+        )
+        self.other_user = AccountUser.objects.create_user(
+            email_address="writer@example.com", password="testpass"
+        )
+
+    def test_reads_use_the_replica_only_when_allowed(self):
+        self.assertEqual(Note.objects.all().db, "default")
+        with replica_reads(self.user.pk):
+            self.assertEqual(Note.objects.all().db, REPLICA_DB_ALIAS)
+            # Accounts, sessions and tokens always come from the primary
+            self.assertEqual(AccountUser.objects.all().db, "default")
+        self.assertEqual(Note.objects.all().db, "default")
+
+    def test_writers_are_pinned_to_the_primary(self):
+        Note.objects.create(title="New", content="Fresh", author=self.other_user)
+
+        with replica_reads(self.other_user.pk):
+            self.assertEqual(Note.objects.all().db, "default")
+        with replica_reads(self.user.pk):
+            self.assertEqual(Note.objects.all().db, REPLICA_DB_ALIAS)
+
+        with override_settings(REPLICA_PIN_SECONDS=0.01):
+            cache.clear()
+            Note.objects.create(title="New", content="Fresh", author=self.user)
+            with mock.patch("django.core.cache.backends.locmem.time.time") as now:
+                now.return_value = 10**10
+                with replica_reads(self.user.pk):
+                    self.assertEqual(Note.objects.all().db, REPLICA_DB_ALIAS)
+
+    def test_views_read_from_the_replica(self):
+        self.client.force_login(self.user)
+        with mock.patch("core.views.replica_reads") as home_reads:
+            self.client.get(reverse("home"))
+        home_reads.assert_called_once_with(self.user.pk)
+
+        with mock.patch("api.views.notes_views.replica_reads") as api_reads:
+            self.client.get(
+                reverse("note-list"),
+                HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}",
+            )
+        api_reads.assert_called_once_with(self.user.pk)
+
+
+class BundlingTests(SimpleTestCase):
+
+    def test_minify_css(self):
+        css = """
+            /* comment */
+            .a :hover , .b > .c::before {
+                content: "  /* kept */  ";
+                margin: 0 auto;
+            }
+        """
+        self.assertEqual(
+            minify_css(css),
+            '.a :hover,.b>.c::before{content: "  /* kept */  ";margin: 0 auto}',
+        )
+
+    def test_strip_unused_icons(self):
+        css = minify_css("""
+            .ri-home:before { content: "\\a1"; }
+            .ri-used:before, .ri-other:before { content: "\\a2"; }
+            .ri-home { color: red; }
+            @media (min-width: 1px) { .ri-home:before { content: "x"; } }
+            @font-face { font-family: "remixicon"; }
+            """)
+        self.assertEqual(
+            strip_unused_icons(css, {"ri-used"}),
+            '.ri-used:before,.ri-other:before{content: "\\a2"}'
+            '.ri-home{color: red}@font-face{font-family: "remixicon"}',
+        )
+
+    def test_rebase_css_urls(self):
+        css = 'a{background:url(../images/a.gif)} b{background:url("data:x")}'
+        self.assertEqual(
+            rebase_css_urls(css, "assets/css/backend.css", "bundles/app.css"),
+            'a{background:url("../assets/images/a.gif")} '
+            'b{background:url("data:x")}',
+        )
+
+    def test_minify_js(self):
+        self.assertEqual(minify_js("  a();\n\n  // note\n  b();\n"), "a();\nb();")
+        template_literal = "x = `a\n  b`;\n"
+        self.assertEqual(minify_js(template_literal), template_literal)
+
+
+class CollectedBundleTests(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(STATIC_ROOT=cls.static_root))
+        call_command("collectstatic", interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, "staticfiles.json")) as f:
+            cls.manifest = json.load(f)["paths"]
+
+    def test_bundles_are_built_hashed_and_compressed(self):
+        name = self.manifest["bundles/app.css"]
+        path = os.path.join(self.static_root, name)
+        self.assertTrue(os.path.exists(path + ".gz"))
+        with open(path) as f:
+            css = f.read()
+        self.assertIn(".ri-menu-line:before", css)
+        self.assertNotIn(".ri-24-hours-fill:before", css)
+        self.assertIn(self.manifest["assets/images/loader.gif"].split("/")[-1], css)
+        self.assertIn("bundles/app.js", self.manifest)
+
+    def test_bundles_are_served_immutable(self):
+        response = self.client.get("/static/" + self.manifest["bundles/app.css"])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("immutable", response["Cache-Control"])
+
+    def test_template_tag(self):
+        template = Template('{% load bundles %}{% bundle "bundles/app.js" %}')
+        html = template.render(Context())
+        self.assertEqual(
+            html, f'<script src="/static/{self.manifest["bundles/app.js"]}"></script>'
+        )
+
+        with override_settings(
+            STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage"
+        ):
+            html = template.render(Context())
+        self.assertIn('src="/static/assets/js/backend-bundle.min.js"', html)
+        self.assertIn('src="/static/assets/js/app.js"', html)
@@ -0,0 +1,99 @@
+"""
+Per-request timings collected by ``RequestTimingMiddleware``.
+
+The timings of the current request live in a context variable, which is
+copied into the threads ``sync_to_async`` runs the ORM in, so queries made
+by async views are counted as well. Without a current request (management
+commands, or the middleware switched off) the hooks below do nothing.
+"""
+
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+from django.template.backends.django import DjangoTemplates as BaseDjangoTemplates
+from django.template.backends.django import Template as BaseTemplate
+from django.template.backends.django import reraise
+from django.template.exceptions import TemplateDoesNotExist
+
+# Statements kept for the slow request log; later ones are only counted
+MAX_RECORDED_QUERIES = 100
+
+current_timings = ContextVar("current_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view_time = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        self.statements = []
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        if len(self.statements) < MAX_RECORDED_QUERIES:
+            self.statements.append((sql, duration))
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+
+def record_queries(execute, sql, params, many, context):
+    """Database execute wrapper adding each statement to the request timings."""
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection, **kwargs):
+    # Connections are per thread, so new ones are hooked as they connect.
+    # Inserted first so execute_wrapper() blocks can still pop their own.
+    if record_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_queries)
+
+
+def install_query_recorders():
+    for connection in connections.all(initialized_only=True):
+        install_query_recorder(connection)
+
+
+class Template(BaseTemplate):
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+
+        # Templates rendered from within a template are already being timed
+        timings.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template_depth -= 1
+            if not timings.template_depth:
+                timings.template_time += time.perf_counter() - started
+
+
+class DjangoTemplates(BaseDjangoTemplates):
+    """The Django template backend, timing every template it renders."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -21,6 +21,7 @@ from rest_framework_simplejwt.views import TokenBlacklistView
 from users.views import SignupView, UserLoginView, UserLogoutView
 
 from .sites import admin_site
+from .views import metrics_view
 
 urlpatterns = [
     path("admin/", admin_site.urls),
@@ -30,4 +31,5 @@ urlpatterns = [
     path("signup/", SignupView.as_view(), name="signup"),
     path("login/", UserLoginView.as_view(), name="login"),
     path("logout/", UserLogoutView.as_view(), name="logout"),
+    path("metrics", metrics_view, name="metrics"),
 ]
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+class UserStatusCache:
+    """
+    Caches whether a user account exists and is active, so stateless token
+    authentication can reject deactivated users without loading the user row
+    on every request.
+
+    Entries are refreshed by the ``AccountUser`` signals; changes that bypass
+    them (``QuerySet.update()``) are picked up once the entry expires.
+    """
+
+    def __init__(self, alias="default"):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @property
+    def timeout(self):
+        return settings.USER_STATUS_CACHE_TIMEOUT
+
+    def make_key(self, user_id):
+        return f"users:active:{user_id}"
+
+    def is_active(self, user_id):
+        from .models import AccountUser
+
+        key = self.make_key(user_id)
+        active = self.cache.get(key)
+        if active is None:
+            active = AccountUser.objects.filter(pk=user_id, is_active=True).exists()
+            self.cache.set(key, active, self.timeout)
+        return active
+
+    def set(self, user_id, active):
+        self.cache.set(self.make_key(user_id), active, self.timeout)
+
+    def forget(self, user_id):
+        self.cache.delete(self.make_key(user_id))
+
+
+user_status_cache = UserStatusCache()
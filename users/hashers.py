@@ -0,0 +1,22 @@
+"""
+The password hashers of ``PASSWORD_HASHER_PROFILE``, with their cost taken
+from the settings. ``manage.py bench_hashing`` measures what a given cost
+takes on this hardware.
+"""
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    def __init__(self, iterations=None):
+        self.iterations = iterations or settings.PBKDF2_ITERATIONS or self.iterations
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """Needs the argon2-cffi package."""
+
+    def __init__(self, time_cost=None, memory_cost=None, parallelism=None):
+        self.time_cost = time_cost or settings.ARGON2_TIME_COST
+        self.memory_cost = memory_cost or settings.ARGON2_MEMORY_COST
+        self.parallelism = parallelism or settings.ARGON2_PARALLELISM
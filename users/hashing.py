@@ -0,0 +1,158 @@
+"""
+Password hashing on a small, bounded pool of threads.
+
+Hashing is deliberately slow, and during a burst of logins it would
+otherwise occupy every request thread of a worker. Instead at most
+``HASHING_WORKERS`` passwords are hashed at once per process and at most
+``HASHING_QUEUE_SIZE`` more wait; beyond that requests fail at once with
+``HashingPoolSaturated`` (answered with a 503), so note traffic keeps its
+threads. The hash functions release the GIL, so the pool uses real cores.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from digithai_note_app import metrics
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+
+
+class HashingPoolSaturated(Exception):
+    """Too many passwords are being hashed; the request should be retried."""
+
+
+class HashingPool:
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.executor = None
+        self.pid = None
+        # Jobs submitted and not finished yet, running or queued
+        self.pending = 0
+
+    def get_executor(self):
+        if self.pid != os.getpid():
+            # Threads do not survive a fork, so each process starts its own
+            self.pid = os.getpid()
+            self.pending = 0
+            self.executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="password-hashing"
+            )
+        return self.executor
+
+    def run(self, function, *args):
+        """Call ``function(*args)`` on the pool and return its result."""
+        if self.workers <= 0:
+            return function(*args)
+
+        with self.lock:
+            executor = self.get_executor()
+            depth = self.pending
+            if depth >= self.workers + self.queue_size:
+                metrics.auth_hashing_jobs.inc("rejected")
+                raise HashingPoolSaturated
+            self.pending += 1
+        metrics.auth_hashing_queue_depth.observe(depth)
+
+        future = executor.submit(self.call, function, args, time.monotonic())
+        future.add_done_callback(self.done)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # A job that has not started yet is dropped; a running one finishes
+            future.cancel()
+            metrics.auth_hashing_jobs.inc("timed_out")
+            raise HashingPoolSaturated
+
+    def call(self, function, args, submitted):
+        started = time.monotonic()
+        metrics.auth_hashing_wait.observe(started - submitted)
+        try:
+            return function(*args)
+        finally:
+            metrics.auth_hashing_duration.observe(time.monotonic() - started)
+
+    def done(self, future):
+        with self.lock:
+            self.pending -= 1
+        if not future.cancelled():
+            metrics.auth_hashing_jobs.inc("completed")
+
+
+hashing_pool = None
+hashing_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    global hashing_pool
+    if hashing_pool is None:
+        with hashing_pool_lock:
+            if hashing_pool is None:
+                hashing_pool = HashingPool(
+                    settings.HASHING_WORKERS,
+                    settings.HASHING_QUEUE_SIZE,
+                    settings.HASHING_TIMEOUT,
+                )
+    return hashing_pool
+
+
+def hash_password(password):
+    return get_hashing_pool().run(make_password, password)
+
+
+def verify_password(password, encoded):
+    """
+    Check ``password`` against ``encoded`` on the hashing pool. Returns
+    whether it matches and whether the hash should be upgraded to the
+    current hasher or its current cost.
+    """
+    if not get_hashing_pool().run(check_password, password, encoded):
+        return False, False
+    preferred = get_hasher("default")
+    hasher = identify_hasher(encoded)
+    must_update = hasher.algorithm != preferred.algorithm or preferred.must_update(
+        encoded
+    )
+    return True, must_update
+
+
+def measure_hasher(hasher, samples=5, concurrency=1, password="bench-password"):
+    """
+    Median hash and verify times of ``hasher`` in milliseconds, and the
+    hashes per second reached by ``concurrency`` threads.
+    """
+
+    def encode():
+        return hasher.encode(password, hasher.salt())
+
+    def timed(function, *args):
+        started = time.perf_counter()
+        function(*args)
+        return (time.perf_counter() - started) * 1000
+
+    encoded = encode()
+    hash_ms = sorted(timed(encode) for _ in range(samples))
+    verify_ms = sorted(timed(hasher.verify, password, encoded) for _ in range(samples))
+
+    jobs = samples * concurrency
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        list(executor.map(lambda _: encode(), range(jobs)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "hash_ms": round(hash_ms[len(hash_ms) // 2], 2),
+        "verify_ms": round(verify_ms[len(verify_ms) // 2], 2),
+        "concurrency": concurrency,
+        "hashes_per_second": round(jobs / elapsed, 1),
+    }
@@ -0,0 +1,95 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from users.hashing import measure_hasher
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure how long password hashing takes with different costs, to "
+        "choose PBKDF2_ITERATIONS or the ARGON2_* settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            choices=sorted(settings.PASSWORD_HASHER_PROFILES),
+            default=settings.PASSWORD_HASHER_PROFILE,
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            action="append",
+            help="PBKDF2 iterations to try (repeatable)",
+        )
+        parser.add_argument(
+            "--time-cost",
+            type=int,
+            action="append",
+            help="Argon2 time costs to try (repeatable)",
+        )
+        parser.add_argument(
+            "--memory-cost",
+            type=int,
+            action="append",
+            help="Argon2 memory costs to try, in KiB (repeatable)",
+        )
+        parser.add_argument(
+            "--parallelism", type=int, default=settings.ARGON2_PARALLELISM
+        )
+        parser.add_argument(
+            "--samples", type=int, default=5, help="Hashes timed per cost"
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=max(settings.HASHING_WORKERS, 1),
+            help="Threads hashing at once for the throughput figure",
+        )
+        parser.add_argument(
+            "--target-ms",
+            type=float,
+            default=250,
+            help="Marks the costs whose hash time stays within this",
+        )
+
+    def handle(self, *args, **options):
+        if options["samples"] < 1 or options["concurrency"] < 1:
+            raise CommandError("--samples and --concurrency must be at least 1.")
+
+        for params, hasher in self.get_hashers(options):
+            try:
+                result = measure_hasher(
+                    hasher, options["samples"], options["concurrency"]
+                )
+            except ValueError as e:
+                # Raised by Django when argon2-cffi is not installed
+                raise CommandError(str(e))
+            within = "*" if result["hash_ms"] <= options["target_ms"] else " "
+            self.stdout.write(
+                f"{within} {options['profile']} {params}: "
+                f"hash {result['hash_ms']} ms, verify {result['verify_ms']} ms, "
+                f"{result['hashes_per_second']} hashes/s with "
+                f"{result['concurrency']} threads"
+            )
+
+    def get_hashers(self, options):
+        if options["profile"] == "pbkdf2":
+            for iterations in options["iterations"] or [
+                PBKDF2PasswordHasher().iterations
+            ]:
+                yield (
+                    f"iterations={iterations}",
+                    PBKDF2PasswordHasher(iterations=iterations),
+                )
+            return
+
+        for time_cost in options["time_cost"] or [settings.ARGON2_TIME_COST]:
+            for memory_cost in options["memory_cost"] or [settings.ARGON2_MEMORY_COST]:
+                yield (
+                    f"time_cost={time_cost} memory_cost={memory_cost} "
+                    f"parallelism={options['parallelism']}",
+                    Argon2PasswordHasher(
+                        time_cost, memory_cost, options["parallelism"]
+                    ),
+                )
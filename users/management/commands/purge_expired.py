@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from users.maintenance import purge_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired JWT outstanding/blacklisted tokens and sessions in "
+        "small batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.PURGE_BATCH_SIZE,
+            help="Rows deleted per statement",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=settings.PURGE_BATCH_PAUSE,
+            help="Seconds to pause between batches",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        for result in purge_expired(
+            batch_size=options["batch_size"],
+            pause=options["sleep"],
+            progress=self.report if options["verbosity"] > 1 else None,
+        ):
+            self.stdout.write(str(result))
+
+    def report(self, result):
+        self.stdout.write(f"{result.name}: {result.deleted} rows removed so far")
@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from .hashing import HashingPoolSaturated
+
+SATURATED_MESSAGE = "Too many logins and sign-ups right now, please try again."
+
+
+class HashingSaturationMiddleware(MiddlewareMixin):
+    """
+    Answers requests that found the password hashing pool full with a 503
+    and a ``Retry-After`` header, instead of a server error.
+    """
+
+    def process_exception(self, request, exception):
+        if not isinstance(exception, HashingPoolSaturated):
+            return None
+        if request.path_info.startswith("/api/"):
+            response = JsonResponse({"detail": SATURATED_MESSAGE}, status=503)
+        else:
+            response = HttpResponse(
+                SATURATED_MESSAGE, status=503, content_type="text/plain"
+            )
+        response["Retry-After"] = str(settings.HASHING_RETRY_AFTER)
+        return response
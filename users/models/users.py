@@ -1,6 +1,7 @@
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
 from django.utils.translation import gettext_lazy as _
+from users.hashing import hash_password, verify_password
 
 from .object_event_tracker import ObjectEventTracker
 from .uuid_primary_key import UUIDPrimaryKey
@@ -68,8 +69,24 @@ class AccountUser(UUIDPrimaryKey, ObjectEventTracker, AbstractUser):
         ordering = ("-date_joined",)
         indexes = [
             models.Index(fields=["email_address"]),
+            # Serves the admin changelist, ordered by (-date_joined, id)
+            models.Index(fields=["-date_joined", "id"], name="user_joined_idx"),
         ]
 
+    def set_password(self, raw_password):
+        # Hashed on the bounded hashing pool, see users.hashing
+        self.password = hash_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        is_correct, must_update = verify_password(raw_password, self.password)
+        if is_correct and must_update:
+            # Upgrade the hash to the current hasher profile
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+        return is_correct
+
     @property
     def name(self):
         name = f"{self.first_name}"
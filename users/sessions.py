@@ -0,0 +1,187 @@
+"""
+A session engine that serves sessions from the cache and writes them to the
+database behind the request. Enable it with
+``SESSION_ENGINE = "users.sessions"``.
+
+Sessions are read from ``SESSION_CACHE_ALIAS`` and only fall back to the
+database on a miss. Saving a session updates the cache at once and queues
+the database row, which a background thread writes every
+``SESSION_WRITE_DELAY`` seconds; several saves of one session in that time
+become a single upsert. Sessions whose data did not change are not saved at
+all. Deleting a session (logging out) is immediate everywhere.
+
+The cache must be shared by all workers (e.g. Redis), otherwise a worker
+may keep serving a session that another one changed or deleted.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.backends.db import SessionStore as DBSessionStore
+from django.core.cache import caches
+from django.db import DatabaseError, connections, router
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "users.sessions"
+
+
+class SessionWriter:
+    """Queues session rows and upserts them in batches."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Held while a batch is written, so deletes cannot be overtaken by it
+        self.flush_lock = threading.Lock()
+        self.pid = None
+        self.thread = None
+        self.pending = {}
+
+    def schedule(self, session):
+        """Write ``session`` (a session model instance) soon."""
+        if settings.SESSION_WRITE_DELAY <= 0:
+            with self.flush_lock:
+                self.write({session.session_key: session})
+            return
+        with self.lock:
+            if self.pid != os.getpid():
+                # The writer thread does not survive a fork
+                self.pid = os.getpid()
+                self.pending = {}
+                self.thread = threading.Thread(
+                    target=self.run, name="session-writer", daemon=True
+                )
+                self.thread.start()
+            self.pending[session.session_key] = session
+
+    def get(self, session_key):
+        """The queued row of ``session_key``, if it has not been written yet."""
+        with self.lock:
+            return self.pending.get(session_key)
+
+    def cancel(self, session_key):
+        with self.flush_lock, self.lock:
+            self.pending.pop(session_key, None)
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            try:
+                self.write(batch)
+            except DatabaseError:
+                logger.exception("Could not write %d sessions", len(batch))
+                with self.lock:
+                    # Retry later, unless the session was saved again since
+                    for session_key, session in batch.items():
+                        self.pending.setdefault(session_key, session)
+
+    def write(self, batch):
+        sessions = list(batch.values())
+        model = type(sessions[0])
+        model.objects.using(router.db_for_write(model)).bulk_create(
+            sessions,
+            update_conflicts=True,
+            unique_fields=["session_key"],
+            update_fields=["session_data", "expire_date"],
+        )
+
+    def run(self):
+        while True:
+            time.sleep(settings.SESSION_WRITE_DELAY)
+            try:
+                self.flush()
+            finally:
+                # Also gives pooled connections back between batches
+                connections.close_all()
+
+
+session_writer = SessionWriter()
+
+
+@atexit.register
+def flush_at_exit():
+    if session_writer.pid == os.getpid():
+        session_writer.flush()
+
+
+class SessionStore(DBSessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        # The data as last loaded or saved, to tell whether it changed
+        self._stored = None
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            # Some backends (e.g. memcache) raise on invalid keys
+            data = None
+        if data is None:
+            session = session_writer.get(self.session_key)
+            if session is None or session.expire_date <= timezone.now():
+                session = self._get_session_from_db()
+            if session:
+                data = self.decode(session.session_data)
+                self._cache.set(
+                    self.cache_key,
+                    data,
+                    self.get_expiry_age(expiry=session.expire_date),
+                )
+            else:
+                data = {}
+        self._stored = copy.deepcopy(data)
+        return data
+
+    def exists(self, session_key):
+        return (
+            self.cache_key_prefix + session_key in self._cache
+            or session_writer.get(session_key) is not None
+            or super().exists(session_key)
+        )
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and data == self._stored:
+            return
+
+        if must_create:
+            if not self._cache.add(self.cache_key, data, self.get_expiry_age()):
+                raise CreateError
+        else:
+            self._cache.set(self.cache_key, data, self.get_expiry_age())
+        session_writer.schedule(self.create_model_instance(data))
+        self._stored = copy.deepcopy(data)
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        session_writer.cancel(session_key)
+        super().delete(session_key)
+        self._cache.delete(self.cache_key_prefix + session_key)
+
+    @classmethod
+    def clear_expired(cls):
+        # Queued sessions are written before expired rows are removed
+        session_writer.flush()
+        super().clear_expired()
@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import user_status_cache
+from .models import AccountUser
+
+
+@receiver(post_save, sender=AccountUser)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Logins save last_login only; nothing to refresh then
+    if update_fields is not None and "is_active" not in update_fields:
+        return
+    user_status_cache.set(instance.pk, instance.is_active)
+
+
+@receiver(post_delete, sender=AccountUser)
+def user_deleted(sender, instance, **kwargs):
+    user_status_cache.forget(instance.pk)
@@ -1,3 +1,214 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import (
+    BlacklistedToken,
+    OutstandingToken,
+)
+
+from .hashing import HashingPool, HashingPoolSaturated
+from .models import AccountUser
+from .sessions import SessionWriter
+
+
+class PurgeExpiredTests(TestCase):
+
+    def setUp(self):
+        self.user = AccountUser.objects.create_user(
+            email_address="purge@example.com", password="password123"
+        )
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user,
+                jti=f"expired-{i}",
+                token="token",
+                expires_at=now - timedelta(days=1),
+            )
+            BlacklistedToken.objects.create(token=token)
+            Session.objects.create(
+                session_key=f"expired-{i}",
+                session_data="",
+                expire_date=now - timedelta(days=1),
+            )
+        OutstandingToken.objects.create(
+            user=self.user, jti="live", token="token", expires_at=now + timedelta(1)
+        )
+        Session.objects.create(
+            session_key="live", session_data="", expire_date=now + timedelta(1)
+        )
+
+    def test_purge_expired(self):
+        out = io.StringIO()
+        call_command("purge_expired", batch_size=2, sleep=0, stdout=out)
+
+        self.assertEqual(
+            list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"]
+        )
+        self.assertFalse(BlacklistedToken.objects.exists())
+        self.assertEqual(list(Session.objects.values_list("pk", flat=True)), ["live"])
+        output = out.getvalue()
+        self.assertIn("Tokens: removed 10 rows in 3 batches", output)
+        self.assertIn("Sessions: removed 5 rows in 3 batches", output)
+        self.assertIn("rows/s", output)
+
+
+class HashingPoolTests(TestCase):
+
+    def test_runs_on_a_worker_thread(self):
+        pool = HashingPool(workers=1, queue_size=0, timeout=5)
+        self.assertNotEqual(pool.run(threading.get_ident), threading.get_ident())
+
+    def test_runs_inline_without_workers(self):
+        pool = HashingPool(workers=0, queue_size=0, timeout=5)
+        self.assertEqual(pool.run(threading.get_ident), threading.get_ident())
+
+    def test_rejects_jobs_when_full(self):
+        pool = HashingPool(workers=1, queue_size=1, timeout=5)
+        release = threading.Event()
+        blocked = [
+            threading.Thread(target=pool.run, args=(release.wait,)) for _ in range(2)
+        ]
+        for thread in blocked:
+            thread.start()
+        while pool.pending < 2:
+            release.wait(0.01)
+
+        with self.assertRaises(HashingPoolSaturated):
+            pool.run(int)
+
+        release.set()
+        for thread in blocked:
+            thread.join()
+        self.assertEqual(pool.pending, 0)
+        self.assertEqual(pool.run(int, "3"), 3)
+
+    def test_times_out(self):
+        pool = HashingPool(workers=1, queue_size=1, timeout=0.01)
+        release = threading.Event()
+        with self.assertRaises(HashingPoolSaturated):
+            pool.run(release.wait)
+        release.set()
+
+
+class PasswordHashingTests(TestCase):
+
+    def setUp(self):
+        self.user = AccountUser.objects.create_user(
+            email_address="hash@example.com", password="password123"
+        )
+
+    def test_check_password(self):
+        self.assertTrue(self.user.check_password("password123"))
+        self.assertFalse(self.user.check_password("password124"))
+
+    def test_upgrades_hash_to_current_cost(self):
+        hashers = list(settings.PASSWORD_HASHERS)
+        with override_settings(PASSWORD_HASHERS=hashers, PBKDF2_ITERATIONS=1000):
+            self.user.set_password("password123")
+            self.user.save()
+            self.assertIn("$1000$", self.user.password)
+        with override_settings(PASSWORD_HASHERS=hashers, PBKDF2_ITERATIONS=2000):
+            self.assertTrue(self.user.check_password("password123"))
+        self.user.refresh_from_db()
+        self.assertIn("$2000$", self.user.password)
+
+    @mock.patch("users.models.users.verify_password", side_effect=HashingPoolSaturated)
+    def test_login_when_saturated(self, verify_password):
+        response = self.client.post(
+            reverse("login"),
+            {"email_address": "hash@example.com", "password": "password123"},
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], str(settings.HASHING_RETRY_AFTER))
+
+        response = self.client.post(
+            reverse("api-login"),
+            {"email_address": "hash@example.com", "password": "password123"},
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("detail", response.json())
+
+
+@override_settings(
+    SESSION_ENGINE="users.sessions",
+    SESSION_WRITE_DELAY=60,
+    STATICFILES_STORAGE="django.contrib.staticfiles.storage.StaticFilesStorage",
+)
+class CachedSessionTests(TestCase):
+
+    def setUp(self):
+        self.user = AccountUser.objects.create_user(
+            email_address="session@example.com", password="password123"
+        )
+        cache.clear()
+        # A writer whose background thread does nothing, flushed by the tests
+        self.writer = SessionWriter()
+        patchers = [
+            mock.patch("users.sessions.session_writer", self.writer),
+            mock.patch.object(SessionWriter, "run"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def log_in(self, remember_me=False):
+        data = {"email_address": "session@example.com", "password": "password123"}
+        if remember_me:
+            data["remember_me"] = "on"
+        response = self.client.post(reverse("login"), data)
+        self.assertRedirects(response, reverse("home"), fetch_redirect_response=False)
+        return self.client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def session_queries(self, path):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in queries if "django_session" in q["sql"]]
+
+    def test_writes_behind(self):
+        session_key = self.log_in(remember_me=True)
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        self.assertEqual(list(self.writer.pending), [session_key])
+
+        self.writer.flush()
+        session = Session.objects.get(session_key=session_key)
+        self.assertAlmostEqual(
+            session.expire_date,
+            timezone.now() + timedelta(seconds=1209600),
+            delta=timedelta(minutes=1),
+        )
+
+    def test_reads_from_cache_and_skips_unmodified(self):
+        self.log_in()
+        self.writer.flush()
+        self.assertEqual(self.session_queries(reverse("home")), [])
+        self.assertEqual(self.writer.pending, {})
+        self.assertTrue(self.client.session.get_expire_at_browser_close())
+
+    def test_falls_back_to_database(self):
+        self.log_in()
+        self.writer.flush()
+        cache.clear()
+        self.assertEqual(len(self.session_queries(reverse("home"))), 1)
+        self.assertEqual(self.session_queries(reverse("home")), [])
+
+    def test_logout_is_immediate(self):
+        session_key = self.log_in()
+        self.writer.flush()
+        self.client.post(reverse("logout"))
+        self.assertFalse(Session.objects.filter(session_key=session_key).exists())
+        self.assertIsNone(cache.get(f"users.sessions{session_key}"))
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response.status_code, 302)